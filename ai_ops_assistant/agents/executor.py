@@ -1,58 +1,366 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
 
 from ai_ops_assistant.llm.schemas import PlanStep, ToolResult
+from ai_ops_assistant.runtime.circuit import CircuitBreakers, CircuitOpen
+from ai_ops_assistant.runtime.deadline import Deadline
+from ai_ops_assistant.runtime.metrics import STAGE_SECONDS, TOOL_SECONDS
+from ai_ops_assistant.runtime.singleflight import SingleFlight
+from ai_ops_assistant.tools.cache import ToolResultCache, tool_call_key
 from ai_ops_assistant.tools.github_tool import GitHubTool
 from ai_ops_assistant.tools.weather_tool import WeatherTool
 
 
+REF_PREFIX = "$"
+
+
+def has_refs(value: Any) -> bool:
+    """Whether a step input contains ``"$<step_id>.<path>"`` references."""
+    if isinstance(value, str):
+        return value.startswith(REF_PREFIX)
+    if isinstance(value, dict):
+        return any(has_refs(item) for item in value.values())
+    if isinstance(value, list):
+        return any(has_refs(item) for item in value)
+    return False
+
+
+class Speculation:
+    """Tool calls started from plan steps before the plan is final.
+
+    ``dispatch`` starts an independent step right away. When the final plan
+    runs, steps whose tool and normalized input match a dispatched call
+    reuse its result (``claim``). ``discard`` cancels the calls the final
+    plan did not use, so their results are never reported. Steps that
+    arrive after ``discard`` (from a planner call that outlived the
+    request) are ignored.
+
+    ``slots`` is the request's concurrency limit. ``execute_iter`` shares
+    it, so speculative and planned calls together stay within it.
+    """
+
+    def __init__(self, executor: "ExecutorAgent", deadline: Optional[Deadline] = None) -> None:
+        self._executor = executor
+        self._deadline = deadline
+        self.slots = asyncio.Semaphore(executor._max_concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._claimed: Set[str] = set()
+        self._closed = False
+
+    def dispatch(self, step: PlanStep) -> None:
+        if self._closed or step.depends_on or has_refs(step.input):
+            return
+        key = tool_call_key(step.tool, step.input)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.ensure_future(
+                self._executor._run_speculative(step.model_copy(deep=True), self._deadline, self.slots)
+            )
+
+    def claim(self, step: PlanStep) -> Optional[asyncio.Task]:
+        key = tool_call_key(step.tool, step.input)
+        task = self._tasks.get(key)
+        if task is not None:
+            self._claimed.add(key)
+        return task
+
+    def discard(self) -> Dict[str, int]:
+        """Cancel unclaimed calls, stop accepting new ones and return dispatch/use counts."""
+        self._closed = True
+        discarded = 0
+        for key, task in self._tasks.items():
+            if key not in self._claimed:
+                task.cancel()
+                discarded += 1
+        return {"dispatched": len(self._tasks), "used": len(self._claimed), "discarded": discarded}
+
+
+class StepMemo:
+    """Tool calls already made for one request, by tool and normalized input.
+
+    ``execute_iter`` looks each step up once its references are resolved.
+    A repeated call reuses the earlier result, whether it came from a
+    duplicate in the plan or from an earlier verification round. So each
+    unique tool call runs at most once per request. ``deduplicated`` counts
+    the steps that were answered this way.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.deduplicated = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, step: PlanStep) -> bool:
+        if step.depends_on or has_refs(step.input):
+            return False
+        return tool_call_key(step.tool, step.input) in self._calls
+
+    def remember(self, result: ToolResult) -> None:
+        """Record a result obtained outside this memo (e.g. from a batch run)."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(result)
+        self._calls.setdefault(tool_call_key(result.tool, result.input), future)
+
+    def new_steps(self, steps: List[PlanStep]) -> List[PlanStep]:
+        """Drop steps whose call was already made or appears earlier in ``steps``."""
+        fresh: List[PlanStep] = []
+        keys: Set[str] = set()
+        for step in steps:
+            key = None if step.depends_on or has_refs(step.input) else tool_call_key(step.tool, step.input)
+            if key is not None and (key in self._calls or key in keys):
+                self.deduplicated += 1
+                continue
+            if key is not None:
+                keys.add(key)
+            fresh.append(step)
+        return fresh
+
+    async def run(self, step: PlanStep, call: Callable[[], Awaitable[ToolResult]]) -> ToolResult:
+        """Run ``call`` for ``step`` unless the same call was already made.
+
+        Returns a copy of the result, so steps never share one ``ToolResult``.
+        """
+        key = tool_call_key(step.tool, step.input)
+        future = self._calls.get(key)
+        if future is None:
+            future = self._calls[key] = asyncio.ensure_future(call())
+        else:
+            self.deduplicated += 1
+        # Shielded: a duplicate being cancelled must not cancel the shared call.
+        result = await asyncio.shield(future)
+        # Each step gets its own copy, reporting the input it was given.
+        return result.model_copy(update={"input": step.input}, deep=True)
+
+
 class ExecutorAgent:
-    """Executes plan steps by calling tools."""
+    """Executes plan steps by calling tools.
+
+    Independent steps run concurrently, bounded by a per-request limit and
+    a limit shared by all requests. A step waits for the steps listed in
+    ``depends_on`` and for any step referenced from its input as
+    ``"$<step_id>.<path>"`` (e.g. ``"$1.items.0.name"``). Results are
+    returned in plan order. Successful outputs are memoized in
+    ``tool_cache`` when one is given, and identical calls already in
+    flight (from any request) are coalesced into one upstream call.
+
+    With a ``deadline``, a step only waits for the request's remaining
+    budget. With ``breakers``, a tool whose upstream keeps failing or
+    timing out fails fast with an error result instead of being called.
+    """
 
-    def __init__(self, github_tool: GitHubTool, weather_tool: WeatherTool) -> None:
+    def __init__(
+        self,
+        github_tool: GitHubTool,
+        weather_tool: WeatherTool,
+        max_concurrency: int = 4,
+        global_concurrency: int = 64,
+        tool_cache: Optional[ToolResultCache] = None,
+        flights: Optional[SingleFlight] = None,
+        breakers: Optional[CircuitBreakers] = None,
+    ) -> None:
         self._tools = {
             "github_search": github_tool.search_repositories,
             "github_repo_details": github_tool.repo_details,
             "weather_current": weather_tool.current_weather,
+            "weather_batch": weather_tool.current_weather_batch,
         }
+        self._max_concurrency = max_concurrency
+        self._global_slots = asyncio.Semaphore(global_concurrency)
+        self._tool_cache = tool_cache
+        self._flights = flights or SingleFlight()
+        self._breakers = breakers
 
-    def execute(self, steps: List[PlanStep]) -> List[ToolResult]:
-        results: List[ToolResult] = []
-        for step in steps:
-            tool_fn = self._tools.get(step.tool)
-            if not tool_fn:
-                results.append(
-                    ToolResult(
-                        tool=step.tool,
-                        input=step.input,
-                        success=False,
-                        output={"error": "Unknown tool"},
-                    )
-                )
-                continue
-            try:
-                if step.tool == "weather_current":
-                    step.input = self._normalize_weather_input(step.input)
-                output = tool_fn(step.input)
-                results.append(
-                    ToolResult(
-                        tool=step.tool,
-                        input=step.input,
-                        success=True,
-                        output=output,
-                    )
-                )
-            except Exception as exc:  # pragma: no cover - defensive
-                results.append(
-                    ToolResult(
-                        tool=step.tool,
-                        input=step.input,
-                        success=False,
-                        output={"error": str(exc)},
-                    )
-                )
-        return results
+    async def execute(
+        self, steps: List[PlanStep], deadline: Optional[Deadline] = None
+    ) -> List[ToolResult]:
+        results: List[Optional[ToolResult]] = [None] * len(steps)
+        async for index, result in self.execute_iter(steps, deadline):
+            results[index] = result
+        return results  # type: ignore[return-value]
+
+    async def execute_iter(
+        self,
+        steps: List[PlanStep],
+        deadline: Optional[Deadline] = None,
+        max_concurrency: Optional[int] = None,
+        speculation: Optional[Speculation] = None,
+        memo: Optional[StepMemo] = None,
+    ) -> AsyncIterator[Tuple[int, ToolResult]]:
+        """Yield ``(plan_index, result)`` pairs as steps complete.
+
+        ``max_concurrency`` overrides the per-request limit (e.g. for batches).
+        Steps already started by ``speculation`` reuse those calls, and steps
+        whose call is in ``memo`` reuse its result.
+        """
+        ids = [step.id or str(position) for position, step in enumerate(steps, start=1)]
+        positions = {step_id: index for index, step_id in enumerate(ids)}
+        if speculation is not None and max_concurrency is None:
+            request_slots = speculation.slots
+        else:
+            request_slots = asyncio.Semaphore(max_concurrency or self._max_concurrency)
+        tasks: List[asyncio.Task] = []
+
+        async def run(index: int) -> ToolResult:
+            step = steps[index]
+            dependencies = self._dependencies(step, positions)
+            invalid = [dep for dep in dependencies if positions.get(dep, index) >= index]
+            if invalid:
+                return self._error(step, f"Invalid dependency on step(s) {invalid}")
+            outputs: Dict[str, Dict[str, Any]] = {}
+            for dep in sorted(dependencies):
+                result = await tasks[positions[dep]]
+                if not result.success:
+                    return self._error(step, f"Dependency '{dep}' failed")
+                outputs[dep] = result.output
+            if outputs:
+                try:
+                    step.input = self._resolve(step.input, outputs)
+                except (KeyError, IndexError, TypeError, ValueError) as exc:
+                    return self._error(step, f"Could not resolve reference: {exc}")
+
+            async def call() -> ToolResult:
+                started = speculation.claim(step) if speculation and not dependencies else None
+                if started is not None:
+                    return await asyncio.shield(started)
+                async with request_slots, self._global_slots:
+                    if deadline is not None and deadline.expired:
+                        return self._error(step, "Request deadline exceeded before the step ran")
+                    return await self._run_step(step, deadline)
+
+            return await (memo.run(step, call) if memo is not None else call())
+
+        tasks.extend(asyncio.ensure_future(run(index)) for index in range(len(steps)))
+        pending = {task: index for index, task in enumerate(tasks)}
+        started = time.perf_counter()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=pending.__getitem__):
+                    yield pending.pop(task), task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="execute")
+
+    def speculate(self, deadline: Optional[Deadline] = None) -> Speculation:
+        """Start tracking speculative tool calls for one request."""
+        return Speculation(self, deadline)
+
+    async def _run_speculative(
+        self, step: PlanStep, deadline: Optional[Deadline], request_slots: asyncio.Semaphore
+    ) -> ToolResult:
+        async with request_slots, self._global_slots:
+            return await self._run_step(step, deadline)
+
+    async def _run_step(self, step: PlanStep, deadline: Optional[Deadline] = None) -> ToolResult:
+        started = time.perf_counter()
+        result = await self._call_tool(step, deadline)
+        TOOL_SECONDS.observe(
+            time.perf_counter() - started,
+            tool=step.tool if step.tool in self._tools else "unknown",
+            outcome="ok" if result.success else "error",
+        )
+        return result
+
+    async def _call_tool(self, step: PlanStep, deadline: Optional[Deadline] = None) -> ToolResult:
+        tool_fn = self._tools.get(step.tool)
+        if not tool_fn:
+            return self._error(step, "Unknown tool")
+        try:
+            if step.tool == "weather_current":
+                step.input = self._normalize_weather_input(step.input)
+            payload = step.input
+            output = self._tool_cache.get(step.tool, payload) if self._tool_cache else None
+            if output is None:
+                breaker = self._breakers.get(step.tool) if self._breakers else None
+
+                async def call() -> Dict[str, Any]:
+                    # Admitted only by the flight leader, and recorded below whatever
+                    # happens, so a half-open probe slot is never left taken.
+                    if breaker is not None and not breaker.allow():
+                        raise CircuitOpen(step.tool)
+                    started = time.monotonic()
+                    ok = True
+                    try:
+                        fresh = await tool_fn(payload)
+                    except BaseException as exc:
+                        ok = not self._is_upstream_failure(exc)
+                        raise
+                    finally:
+                        if breaker is not None:
+                            breaker.record(ok, time.monotonic() - started)
+                    if self._tool_cache:
+                        self._tool_cache.set(step.tool, payload, fresh)
+                    return fresh
+
+                shared = self._flights.do(tool_call_key(step.tool, payload), call)
+                output = await (deadline.run(shared, step.tool) if deadline else shared)
+            return ToolResult(
+                tool=step.tool,
+                input=step.input,
+                success=True,
+                output=output,
+            )
+        except Exception as exc:  # pragma: no cover - defensive
+            return self._error(step, str(exc))
+
+    @staticmethod
+    def _is_upstream_failure(exc: BaseException) -> bool:
+        """Whether an error means the upstream is unhealthy (not a bad input)."""
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code >= 500 or exc.response.status_code == 429
+        return isinstance(exc, (httpx.TransportError, asyncio.CancelledError))
+
+    @staticmethod
+    def _error(step: PlanStep, message: str) -> ToolResult:
+        return ToolResult(
+            tool=step.tool,
+            input=step.input,
+            success=False,
+            output={"error": message},
+        )
+
+    @classmethod
+    def _dependencies(cls, step: PlanStep, known: Dict[str, int]) -> Set[str]:
+        found = set(step.depends_on)
+        cls._collect_refs(step.input, known, found)
+        return found
+
+    @classmethod
+    def _collect_refs(cls, value: Any, known: Dict[str, int], found: Set[str]) -> None:
+        if isinstance(value, str) and value.startswith(REF_PREFIX):
+            step_id = value[len(REF_PREFIX):].split(".", 1)[0]
+            if step_id in known:
+                found.add(step_id)
+        elif isinstance(value, dict):
+            for item in value.values():
+                cls._collect_refs(item, known, found)
+        elif isinstance(value, list):
+            for item in value:
+                cls._collect_refs(item, known, found)
+
+    @classmethod
+    def _resolve(cls, value: Any, outputs: Dict[str, Dict[str, Any]]) -> Any:
+        """Replace ``"$<step_id>.<path>"`` strings with values from earlier outputs."""
+        if isinstance(value, str) and value.startswith(REF_PREFIX):
+            step_id, _, path = value[len(REF_PREFIX):].partition(".")
+            if step_id not in outputs:
+                return value
+            current: Any = outputs[step_id]
+            for part in path.split(".") if path else []:
+                current = current[int(part)] if isinstance(current, list) else current[part]
+            return current
+        if isinstance(value, dict):
+            return {key: cls._resolve(item, outputs) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls._resolve(item, outputs) for item in value]
+        return value
 
     @staticmethod
     def _normalize_weather_input(payload: Dict[str, str]) -> Dict[str, str]:
@@ -1,40 +1,78 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Any, Callable, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import ValidationError
 
+from ai_ops_assistant.agents.router import IntentRouter
 from ai_ops_assistant.llm.client import LlmClient
 from ai_ops_assistant.llm.schemas import Plan, PlanStep
+from ai_ops_assistant.runtime.deadline import Deadline
+from ai_ops_assistant.runtime.metrics import STAGE_SECONDS
+from ai_ops_assistant.runtime.trace import current_trace
 
 
 class PlannerAgent:
-    """Creates a structured step-by-step plan using the LLM."""
+    """Creates a structured step-by-step plan using the LLM.
 
-    def __init__(self, llm: LlmClient) -> None:
+    When a ``router`` is given, tasks it recognizes are planned directly
+    and the LLM is only called for the rest. With ``on_step``, the LLM plan
+    is streamed and each step is passed to ``on_step`` as soon as it is
+    complete, before the plan as a whole has been validated.
+    """
+
+    def __init__(self, llm: LlmClient, router: Optional[IntentRouter] = None) -> None:
         self._llm = llm
+        self._router = router
+
+    @STAGE_SECONDS.timed(stage="plan")
+    async def plan(
+        self,
+        task: str,
+        deadline: Optional[Deadline] = None,
+        on_step: Optional[Callable[[PlanStep], None]] = None,
+    ) -> Plan:
+        trace = current_trace().section("planner")
+        route = self._router.route(task) if self._router else None
+        if route is not None:
+            trace.update(fast_path=True, confidence=route.confidence)
+            return route.plan
+        trace["fast_path"] = False
 
-    def plan(self, task: str) -> Plan:
         system = (
             "You are a planning agent. Given a task, create a step-by-step plan.\n\n"
             "Available tools:\n"
             "- github_search: Search GitHub repos. Input: {\"query\": \"search term\", \"per_page\": 5}\n"
             "- github_repo_details: Get repo details. Input: {\"full_name\": \"owner/repo\"}\n"
-            "- weather_current: Get weather. Input: {\"city\": \"CityName\"}\n\n"
+            "- weather_current: Get weather. Input: {\"city\": \"CityName\"}\n"
+            "- weather_batch: Get weather for several cities in one call. "
+            "Input: {\"cities\": [\"City1\", \"City2\"]}\n\n"
+            "Use one weather_batch step instead of several weather_current steps.\n\n"
             "Return ONLY a JSON object with this exact structure:\n"
             "{\"steps\": [{\"tool\": \"tool_name\", \"input\": {...}}, ...]}\n\n"
+            "Independent steps run in parallel. If a step needs an earlier step's result, "
+            "give the earlier step an \"id\" and reference its output as \"$<id>.<path>\".\n\n"
             "Example:\n"
             "{\"steps\": [{\"tool\": \"github_search\", \"input\": {\"query\": \"fastapi\"}}, "
-            "{\"tool\": \"weather_current\", \"input\": {\"city\": \"Berlin\"}}]}"
+            "{\"tool\": \"weather_current\", \"input\": {\"city\": \"Berlin\"}}]}\n\n"
+            "Dependent example:\n"
+            "{\"steps\": [{\"id\": \"s1\", \"tool\": \"github_search\", \"input\": {\"query\": \"fastapi\", \"per_page\": 1}}, "
+            "{\"tool\": \"github_repo_details\", \"input\": {\"full_name\": \"$s1.items.0.name\"}}]}"
         )
         user = f"Task: {task}\n\nReturn the plan as JSON with 'steps' array:"
 
-        class PlanSchema(BaseModel):
-            steps: List[PlanStep] = Field(..., description="Ordered steps to complete the task")
+        def on_item(item: Any) -> None:
+            try:
+                step = PlanStep.model_validate(item)
+            except ValidationError:
+                return
+            on_step(step)
 
-        response = self._llm.chat_json(
+        return await self._llm.chat_json(
             system=system,
             user=user,
-            schema=PlanSchema,
+            schema=Plan,
+            stage="planner",
+            deadline=deadline,
+            on_item=on_item if on_step else None,
         )
-        return Plan(steps=response.steps)
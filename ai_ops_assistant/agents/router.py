@@ -0,0 +1,213 @@
+"""Rule-based intent router that plans common task shapes without the LLM."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Pattern, Tuple
+
+from ai_ops_assistant.llm.schemas import Plan, PlanStep
+from ai_ops_assistant.tools.gazetteer import Gazetteer, default_gazetteer
+
+
+_CLAUSE_SPLIT = re.compile(r"\s*(?:,\s*and|;|\band\b(?: also)?|\bthen\b|,)\s+", re.IGNORECASE)
+_TRAILING = re.compile(r"[\s.!?]+$")
+_NUMBERS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "ten": 10}
+
+_WEATHER = re.compile(
+    r"^(?:(?:please|can you|could you)\s+)?"
+    r"(?:(?:get|show|tell|give)(?: me)?\s+|what(?:['\u2019]s| is)\s+)?"
+    r"(?:the\s+)?(?:current\s+|today['\u2019]?s\s+)?"
+    r"(?:weather|temperature|forecast)(?:\s+like)?\s+(?:in|for|at)\s+"
+    r"(?P<city>[^\d,;]+?)(?:\s+(?:today|now|right now))?$",
+    re.IGNORECASE,
+)
+# A bare, capitalized place name continuing a weather clause ("weather in Berlin and Paris").
+_MORE_CITIES = re.compile(
+    r"^(?:(?:in|for|at)\s+)?(?P<city>[A-Z][\w'\u2019.-]*(?:\s+[A-Z][\w'\u2019.-]*){0,2})$"
+)
+_REPO_DETAILS = re.compile(
+    r"^(?:(?:get|show|give|tell)(?: me)?\s+)?"
+    r"(?:(?:the\s+)?(?:details|info|information|stats)\s+(?:for|about|on|of)\s+|about\s+)"
+    r"(?:the\s+)?(?:repo(?:sitory)?\s+)?(?P<full_name>[\w.-]+/[\w.-]+)$",
+    re.IGNORECASE,
+)
+_SEARCH = re.compile(
+    r"^(?:(?P<verb>find|search(?: for)?|show(?: me)?|list|get|give me)\s+)?"
+    r"(?:(?:a|an|some|the)\s+)?"
+    r"(?:(?P<rank>top|popular|best|most popular)\s+)?"
+    r"(?:(?P<count>\d+|one|two|three|four|five|ten)\s+)?"
+    r"(?:(?P<kind>popular|top|best|open[- ]source)\s+)?"
+    r"(?:(?P<github>github)\s+)?"
+    r"(?:(?:repos?|repository|repositories|projects?)\s+(?:about|for|on|related to)\s+(?P<topic_after>.+?)"
+    r"|(?P<topic>.+?)\s+(?:repos?|repository|repositories|projects?))"
+    r"(?:\s+on\s+github)?$",
+    re.IGNORECASE,
+)
+
+# Shapes of a single city or search-topic word.
+_CITY_WORD = re.compile(r"^[^\W\d_][\w'\u2019.-]*$")
+_TOPIC_WORD = re.compile(r"^[\w.+#-]+$")
+# Time qualifiers: the weather tool only reports current conditions.
+_WHEN = re.compile(
+    r"\b(?:tomorrow|tonight|yesterday|today|now|next|last|this|week(?:end)?|month|year"
+    r"|morning|afternoon|evening|hours?|days?"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.IGNORECASE,
+)
+# Leading verbs the search template does not handle ("delete my repos").
+_VERBS = frozenset(
+    "find search show list get give delete remove create make fork star unstar clone open close"
+    " archive update add tell fetch display check watch".split()
+)
+_PRONOUNS = frozenset("i me my mine we us our ours you your yours he him his she her they them their its".split())
+_FILLER = frozenset("a an the some any all every this that these those other more new".split())
+# Ranking words the template reads as framing; on their own they are no topic ("top 5 repos").
+_RANKING = frozenset("top popular best most trending starred open-source opensource open source".split())
+_PREPOSITIONS = frozenset("in with from by of for on about to at that which without".split())
+
+# Words that signal the task needs reasoning the templates cannot express.
+_COMPLEX_WORDS = re.compile(
+    r"\b(?:compare|comparison|versus|vs|summari[sz]e|explain|why|which|recommend|best for)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Route:
+    """A fast-path plan and how confident the router is in it."""
+
+    plan: Plan
+    confidence: float
+
+
+def _weather(match: re.Match) -> Tuple[PlanStep, float]:
+    city = match.group("city").strip()
+    words = city.split()
+    if _WHEN.search(city):
+        # A forecast or a past date, which ``weather_current`` cannot answer.
+        confidence = 0.0
+    elif len(words) <= 3 and all(_CITY_WORD.match(word) for word in words):
+        confidence = 0.95
+    else:
+        confidence = 0.5
+    return PlanStep(tool="weather_current", input={"city": city}), confidence
+
+
+def _batch_weather(steps: List[PlanStep]) -> List[PlanStep]:
+    """Fold several ``weather_current`` steps into one ``weather_batch`` step."""
+    cities = [step.input["city"] for step in steps if step.tool == "weather_current"]
+    if len(cities) < 2:
+        return steps
+    batched: List[PlanStep] = []
+    for step in steps:
+        if step.tool != "weather_current":
+            batched.append(step)
+        elif cities:
+            batched.append(PlanStep(tool="weather_batch", input={"cities": cities}))
+            cities = []
+    return batched
+
+
+def _repo_details(match: re.Match) -> Tuple[PlanStep, float]:
+    return PlanStep(tool="github_repo_details", input={"full_name": match.group("full_name")}), 0.95
+
+
+def _search(match: re.Match) -> Tuple[PlanStep, float]:
+    topic = (match.group("topic") or match.group("topic_after")).strip()
+    count = match.group("count")
+    per_page = 5
+    if count:
+        per_page = int(count) if count.isdigit() else _NUMBERS[count.lower()]
+    payload = {"query": topic, "per_page": max(1, min(per_page, 30))}
+    return PlanStep(tool="github_search", input=payload), _topic_confidence(match, topic)
+
+
+def _topic_confidence(match: re.Match, topic: str) -> float:
+    """Score a search clause by the shape of its topic and framing."""
+    words = topic.lower().split()
+    if (
+        not words
+        or words[0] in _VERBS
+        or any(word in _PRONOUNS for word in words)
+        or all(word in _FILLER or word in _RANKING or word in _NUMBERS or word.isdigit() for word in words)
+    ):
+        # Not a topic: an unknown action ("delete my"), the user's own repos,
+        # or only ranking and count words ("top 5", "most popular").
+        return 0.0
+    if (
+        len(words) > 3
+        or any(word in _PREPOSITIONS for word in words)
+        or not all(_TOPIC_WORD.match(word) for word in words)
+    ):
+        # A phrase ("issues in owner/repo") rather than a keyword.
+        return 0.5
+    framed = match.group("topic_after") or any(
+        match.group(name) for name in ("verb", "rank", "count", "kind", "github")
+    )
+    # A bare "<words> repos" may start with a verb the template does not know.
+    return 0.9 if framed else 0.6
+
+
+_RULES: List[Tuple[Pattern[str], Callable[[re.Match], Tuple[PlanStep, float]]]] = [
+    (_WEATHER, _weather),
+    (_REPO_DETAILS, _repo_details),
+    (_SEARCH, _search),
+]
+
+
+class IntentRouter:
+    """Builds plans for recognized task shapes with regex templates.
+
+    A task is split into clauses ("weather in Berlin and top FastAPI
+    repos"); every clause must fully match a template, otherwise the task
+    is left to the LLM planner. A bare city name right after a weather
+    clause asks for that city's weather too if the gazetteer knows it
+    ("weather in Berlin and Paris", not "... and GitHub"), and weather for several
+    cities is planned as a single ``weather_batch`` step. The route's
+    confidence is that of its weakest clause.
+
+    Confidence comes from the shape of what was captured, not its length:
+    a city of plain words, or a keyword topic introduced by a known verb
+    or qualifier ("find", "top 5", "repos about"), is trusted. A time
+    qualifier in the city, or a topic that is empty, only pronouns and
+    filler, or led by an unknown verb, scores zero; other phrases score
+    below the default threshold so the LLM planner runs.
+    """
+
+    def __init__(self, threshold: float = 0.8, gazetteer: Optional[Gazetteer] = None) -> None:
+        self._threshold = threshold
+        self._gazetteer = gazetteer or default_gazetteer()
+
+    def route(self, task: str) -> Optional[Route]:
+        """Return a plan if the task is recognized with enough confidence."""
+        text = _TRAILING.sub("", task.strip())
+        if not text or _COMPLEX_WORDS.search(text):
+            return None
+        steps: List[PlanStep] = []
+        confidence = 1.0
+        for clause in _CLAUSE_SPLIT.split(text):
+            matched = self._match_clause(clause.strip())
+            if matched is None and steps and steps[-1].tool == "weather_current":
+                more = _MORE_CITIES.match(clause.strip())
+                if more:
+                    step, more_confidence = _weather(more)
+                    if self._gazetteer.lookup(step.input["city"]) is None:
+                        # Any capitalized word fits the pattern; only trust known cities.
+                        more_confidence = min(more_confidence, 0.5)
+                    matched = step, more_confidence
+            if matched is None:
+                return None
+            step, clause_confidence = matched
+            steps.append(step)
+            confidence = min(confidence, clause_confidence)
+        if not steps or confidence < self._threshold:
+            return None
+        return Route(plan=Plan(steps=_batch_weather(steps)), confidence=confidence)
+
+    @staticmethod
+    def _match_clause(clause: str) -> Optional[Tuple[PlanStep, float]]:
+        for pattern, build in _RULES:
+            match = pattern.match(clause)
+            if match:
+                return build(match)
+        return None
@@ -0,0 +1,73 @@
+"""Deterministic renderers that turn simple tool results into a FinalResponse."""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+from ai_ops_assistant.llm.schemas import FinalResponse, ToolResult
+
+
+def _conditions(output: Dict[str, Any]) -> str:
+    place = ", ".join(part for part in (output.get("city"), output.get("country")) if part)
+    return (
+        f"{place}: {output.get('temperature')}°C "
+        f"(feels like {output.get('feels_like')}°C), {output.get('conditions')}, "
+        f"humidity {output.get('humidity')}%"
+    )
+
+
+def _weather(output: Dict[str, Any]) -> FinalResponse:
+    answer = f"Current weather in {_conditions(output)}."
+    return FinalResponse(answer=answer, data=output, sources=["Open-Meteo API"])
+
+
+def _weather_batch(output: Dict[str, Any]) -> FinalResponse:
+    listed = "; ".join(
+        f"{entry.get('city')}: unavailable ({entry['error']})" if "error" in entry else _conditions(entry)
+        for entry in output["cities"]
+    )
+    return FinalResponse(answer=f"Current weather: {listed}.", data=output, sources=["Open-Meteo API"])
+
+
+def _search(output: Dict[str, Any], query: str) -> FinalResponse:
+    items: List[Dict[str, Any]] = output.get("items", [])
+    if not items:
+        answer = f"No GitHub repositories found for '{query}'."
+    else:
+        listed = "; ".join(
+            f"{item['name']} ({item['stars']} stars)"
+            + (f": {item['description']}" if item.get("description") else "")
+            for item in items
+        )
+        answer = f"Top {len(items)} GitHub repositories for '{query}': {listed}."
+    return FinalResponse(answer=answer, data={"query": query, **output}, sources=["GitHub API"])
+
+
+def _repo_details(output: Dict[str, Any]) -> FinalResponse:
+    description = f": {output['description']}" if output.get("description") else ""
+    answer = (
+        f"{output.get('name')}{description}. {output.get('stars')} stars, "
+        f"{output.get('forks')} forks, {output.get('open_issues')} open issues, "
+        f"written in {output.get('language') or 'an unknown language'}."
+    )
+    return FinalResponse(answer=answer, data=output, sources=["GitHub API"])
+
+
+_RENDERERS: Dict[str, Callable[[ToolResult], FinalResponse]] = {
+    "weather_current": lambda result: _weather(result.output),
+    "weather_batch": lambda result: _weather_batch(result.output),
+    "github_search": lambda result: _search(result.output, str(result.input.get("query", ""))),
+    "github_repo_details": lambda result: _repo_details(result.output),
+}
+
+
+def render_template(results: List[ToolResult]) -> Optional[FinalResponse]:
+    """Render a single successful tool result, or return None if the LLM is needed."""
+    if len(results) != 1 or not results[0].success:
+        return None
+    renderer = _RENDERERS.get(results[0].tool)
+    if renderer is None:
+        return None
+    try:
+        return renderer(results[0])
+    except (KeyError, TypeError):
+        return None
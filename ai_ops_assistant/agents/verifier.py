@@ -2,77 +2,52 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from pydantic import AliasChoices, BaseModel, Field, field_validator
-from pydantic.config import ConfigDict
-
+from ai_ops_assistant.agents.templates import render_template
 from ai_ops_assistant.llm.client import LlmClient
-from ai_ops_assistant.llm.schemas import FinalResponse, Plan, PlanStep, ToolResult, VerificationResult
+from ai_ops_assistant.llm.prompts import PromptBuilder
+from ai_ops_assistant.llm.schemas import (
+    FinalResponse,
+    Plan,
+    ToolResult,
+    VerificationResult,
+    VerificationSchema,
+)
+from ai_ops_assistant.runtime.deadline import Deadline, DeadlineExceeded
+from ai_ops_assistant.runtime.metrics import STAGE_SECONDS
+from ai_ops_assistant.runtime.trace import current_trace
 
 
 class VerifierAgent:
     """Validates results and composes the final response."""
 
-    def __init__(self, llm: LlmClient) -> None:
+    def __init__(self, llm: LlmClient, prompts: Optional[PromptBuilder] = None) -> None:
         self._llm = llm
+        self._prompts = prompts or PromptBuilder()
 
-    def verify(
+    @STAGE_SECONDS.timed(stage="verify")
+    async def verify(
         self,
         task: str,
         plan: Plan,
         results: List[ToolResult],
+        deadline: Optional[Deadline] = None,
     ) -> VerificationResult:
         system = (
             "You are the Verifier Agent. Check if the tool results are complete and correct. "
             "If anything is missing, propose additional steps using available tools. "
             "Return JSON only."
         )
-        user = (
-            "Task: "
-            f"{task}\n\nPlan: {plan.model_dump()}\n\nResults: "
-            f"{[r.model_dump() for r in results]}"
+        user = self._prompts.fit(
+            f"Task: {task}\n\nPlan: {self._prompts.plan(plan)}\n\nResults: ",
+            results,
         )
 
-        class VerificationSchema(BaseModel):
-            model_config = ConfigDict(populate_by_name=True)
-
-            is_complete: bool = Field(
-                ...,
-                description="True if results satisfy the task",
-                validation_alias=AliasChoices(
-                    "is_complete",
-                    "verification_status",
-                    "status",
-                    "plan_complete",
-                    "completed",
-                ),
-            )
-            missing: List[str] = Field(default_factory=list, description="What is missing")
-            suggested_steps: List[PlanStep] = Field(
-                default_factory=list,
-                description="Extra steps to fill gaps",
-            )
-            final_response: Optional[FinalResponse] = Field(
-                default=None,
-                validation_alias=AliasChoices(
-                    "final_response",
-                    "response",
-                    "final",
-                    "final_answer",
-                    "answer",
-                ),
-            )
-
-            @field_validator("is_complete", mode="before")
-            @classmethod
-            def _normalize_status(cls, value):
-                if isinstance(value, str):
-                    return value.strip().lower() in {"complete", "true", "yes", "ok", "done"}
-                return value
-
-        response = self._llm.chat_json(
+        response = await self._llm.chat_json(
             system=system,
             user=user,
             schema=VerificationSchema,
+            stage="verify",
+            deadline=deadline,
         )
 
         final_response = response.final_response or FinalResponse(
@@ -89,12 +64,29 @@ class VerifierAgent:
             final_response=final_response,
         )
 
-    def finalize(
+    @STAGE_SECONDS.timed(stage="finalize")
+    async def finalize(
         self,
         task: str,
         plan: Plan,
         results: List[ToolResult],
+        use_template: bool = True,
+        deadline: Optional[Deadline] = None,
     ) -> FinalResponse:
+        """Compose the final response.
+
+        With ``use_template``, a single successful result from a known tool
+        is rendered deterministically; anything else goes to the LLM. If the
+        request deadline runs out first, the raw results are returned.
+        """
+        trace = current_trace().section("finalize")
+        if use_template:
+            rendered = render_template(results)
+            if rendered is not None:
+                trace["template"] = True
+                return rendered
+        trace["template"] = False
+
         system = (
             "You are a response generator. Use the tool results to answer the user's task.\n\n"
             "Return ONLY a JSON object with this exact structure:\n"
@@ -103,9 +95,24 @@ class VerifierAgent:
             "{\"answer\": \"Found repo X with 1000 stars. Berlin weather is 10°C.\", "
             "\"data\": {\"repo\": \"owner/name\", \"temp\": 10}, \"sources\": [\"GitHub API\", \"Open-Meteo API\"]}"
         )
-        user = (
-            f"Task: {task}\n\n"
-            f"Tool results: {[r.model_dump() for r in results]}\n\n"
-            "Create a final response as JSON:"
+        user = self._prompts.fit(
+            f"Task: {task}\n\nTool results: ",
+            results,
+            "\n\nCreate a final response as JSON:",
         )
-        return self._llm.chat_json(system=system, user=user, schema=FinalResponse)
+        try:
+            return await self._llm.chat_json(
+                system=system,
+                user=user,
+                schema=FinalResponse,
+                stage="finalize",
+                deadline=deadline,
+            )
+        except DeadlineExceeded:
+            trace["deadline_exceeded"] = True
+            return FinalResponse(
+                answer="The request deadline was reached before a summary could be written; "
+                "the raw tool results are included in data.",
+                data={"results": [result.model_dump() for result in results]},
+                sources=sorted({result.tool for result in results if result.success}),
+            )
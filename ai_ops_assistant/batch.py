@@ -0,0 +1,61 @@
+"""Merging of plan steps across a batch of tasks."""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from ai_ops_assistant.agents.executor import REF_PREFIX, has_refs
+from ai_ops_assistant.llm.schemas import Plan, PlanStep
+from ai_ops_assistant.tools.cache import tool_call_key
+
+
+def _rename_refs(value: Any, ids: Dict[str, str]) -> Any:
+    """Point ``"$<id>.<path>"`` references at the merged step ids."""
+    if isinstance(value, str) and value.startswith(REF_PREFIX):
+        step_id, dot, path = value[len(REF_PREFIX):].partition(".")
+        if step_id in ids:
+            return f"{REF_PREFIX}{ids[step_id]}{dot}{path}"
+        return value
+    if isinstance(value, dict):
+        return {key: _rename_refs(item, ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rename_refs(item, ids) for item in value]
+    return value
+
+
+def merge_plans(plans: List[Plan]) -> Tuple[List[PlanStep], List[List[int]]]:
+    """Combine the steps of several plans into one deduplicated step list.
+
+    Steps without dependencies are merged when their ``tool_call_key``
+    matches. Steps that depend on others are kept per task, since their
+    input is only known once the dependencies have run. Merged steps get
+    fresh ids (``u<n>``) and references are rewritten to use them.
+
+    Returns the merged steps and, for each plan, the merged index of each
+    of its steps.
+    """
+    merged: List[PlanStep] = []
+    by_key: Dict[str, int] = {}
+    mapping: List[List[int]] = []
+    for plan in plans:
+        ids: Dict[str, str] = {}
+        indices: List[int] = []
+        for position, step in enumerate(plan.steps, start=1):
+            dependent = bool(step.depends_on) or has_refs(step.input)
+            key = None if dependent else tool_call_key(step.tool, step.input)
+            index = by_key.get(key) if key is not None else None
+            if index is None:
+                index = len(merged)
+                merged.append(
+                    PlanStep(
+                        tool=step.tool,
+                        input=_rename_refs(step.input, ids),
+                        id=f"u{index}",
+                        depends_on=[ids.get(dep, dep) for dep in step.depends_on],
+                    )
+                )
+                if key is not None:
+                    by_key[key] = index
+            ids[step.id or str(position)] = f"u{index}"
+            indices.append(index)
+        mapping.append(indices)
+    return merged, mapping
@@ -0,0 +1 @@
+"""Record/replay of LLM and upstream HTTP traffic."""
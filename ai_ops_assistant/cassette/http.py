@@ -0,0 +1,94 @@
+"""httpx transports that record upstream API traffic to, or replay it from, a cassette."""
+from __future__ import annotations
+
+import base64
+import time
+from typing import Dict
+
+import httpx
+
+from ai_ops_assistant.cassette.store import Cassette
+
+
+# Headers the tools and the rate limiter read; everything else is dropped.
+_KEPT_HEADERS = ("content-type", "etag", "last-modified", "retry-after", "cache-control")
+
+
+def http_key(request: httpx.Request, conditional: bool = True) -> str:
+    """``METHOD /path?sorted-query``, marked when sent with cache validators.
+
+    The host is left out so a cassette also replays when the tools point
+    at other base URLs (``GITHUB_API_URL`` and the like).
+    """
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.url.params.multi_items()))
+    key = f"{request.method} {request.url.path}?{query}"
+    if conditional and ("if-none-match" in request.headers or "if-modified-since" in request.headers):
+        key += " conditional"
+    return key
+
+
+def _kept_headers(response: httpx.Response) -> Dict[str, str]:
+    return {
+        name: value
+        for name, value in response.headers.items()
+        if name in _KEPT_HEADERS or name.startswith("x-ratelimit-")
+    }
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Sends requests through ``transport`` and records each response and its latency."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cassette: Cassette) -> None:
+        self._transport = transport
+        self._cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        # Read here so the recorded latency includes the body; the client
+        # reuses the loaded (already decoded) content.
+        body = await response.aread()
+        try:
+            text, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(body).decode("ascii"), "base64"
+        self._cassette.record("http", http_key(request), {
+            "method": request.method,
+            "url": str(request.url),
+            "status": response.status_code,
+            "headers": _kept_headers(response),
+            "body": text,
+            "encoding": encoding,
+            "latency": round(time.perf_counter() - started, 4),
+        })
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers requests with recorded responses instead of touching the network.
+
+    A conditional request that was never recorded falls back to the plain
+    request's response, since validators held locally can differ between
+    the recording and the replay. Anything else unrecorded raises
+    ``CassetteMiss``.
+    """
+
+    def __init__(self, cassette: Cassette) -> None:
+        self._cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = http_key(request)
+        entry = self._cassette.next("http", key)
+        if entry is None and key.endswith(" conditional"):
+            entry = self._cassette.next("http", http_key(request, conditional=False))
+        if entry is None:
+            raise self._cassette.miss("http", key)
+        await self._cassette.pause(entry.get("latency"))
+        body = entry.get("body", "")
+        content = base64.b64decode(body) if entry.get("encoding") == "base64" else body.encode("utf-8")
+        return httpx.Response(
+            entry["status"], headers=entry.get("headers", {}), content=content, request=request
+        )
@@ -0,0 +1,159 @@
+"""Gemini model wrappers that record calls to, or replay them from, a cassette."""
+from __future__ import annotations
+
+import hashlib
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from google.api_core.exceptions import ResourceExhausted
+
+from ai_ops_assistant.cassette.store import Cassette
+
+
+def llm_key(model_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode()).hexdigest()
+
+
+def _usage(response: Any) -> Dict[str, int]:
+    usage = getattr(response, "usage_metadata", None)
+    return {
+        name: getattr(usage, name, 0) or 0
+        for name in ("prompt_token_count", "candidates_token_count")
+    }
+
+
+def _text(response: Any) -> Optional[str]:
+    try:
+        return response.text
+    except ValueError:
+        # Responses or chunks without text parts (e.g. blocked or finish-reason only).
+        return None
+
+
+class RecordingModel:
+    """Wraps a ``GenerativeModel`` and records each call's prompt, response and latency."""
+
+    def __init__(self, model: Any, cassette: Cassette, model_name: str) -> None:
+        self._model = model
+        self._cassette = cassette
+        self._model_name = model_name
+
+    async def generate_content_async(
+        self, prompt: str, generation_config: Any = None, stream: bool = False
+    ) -> Any:
+        key = llm_key(self._model_name, prompt)
+        started = time.perf_counter()
+        try:
+            response = await self._model.generate_content_async(
+                prompt, generation_config=generation_config, stream=stream
+            )
+        except ResourceExhausted as exc:
+            # Replayed as the same error, so retry and backoff paths are exercised.
+            self._cassette.record("llm", key, {
+                "model": self._model_name,
+                "prompt": prompt,
+                "error": "resource_exhausted",
+                "message": str(exc),
+                "latency": round(time.perf_counter() - started, 4),
+            })
+            raise
+        if stream:
+            return _RecordingStream(response, self._cassette, key, self._model_name, prompt, started)
+        self._cassette.record("llm", key, {
+            "model": self._model_name,
+            "prompt": prompt,
+            "text": _text(response),
+            "usage": _usage(response),
+            "latency": round(time.perf_counter() - started, 4),
+        })
+        return response
+
+
+class _RecordingStream:
+    """Passes a streamed response through and records it once fully consumed."""
+
+    def __init__(
+        self, response: Any, cassette: Cassette, key: str, model_name: str, prompt: str, started: float
+    ) -> None:
+        self._response = response
+        self._cassette = cassette
+        self._key = key
+        self._model_name = model_name
+        self._prompt = prompt
+        self._started = started
+
+    @property
+    def usage_metadata(self) -> Any:
+        return getattr(self._response, "usage_metadata", None)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        chunks: List[str] = []
+        first_chunk: Optional[float] = None
+        async for chunk in self._response:
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - self._started
+            text = _text(chunk)
+            if text is not None:
+                chunks.append(text)
+            yield chunk
+        self._cassette.record("llm", self._key, {
+            "model": self._model_name,
+            "prompt": self._prompt,
+            "text": "".join(chunks),
+            "chunks": chunks,
+            "usage": _usage(self._response),
+            "first_chunk": round(first_chunk or 0.0, 4),
+            "latency": round(time.perf_counter() - self._started, 4),
+        })
+
+
+class ReplayModel:
+    """Stands in for a ``GenerativeModel``, answering from a cassette.
+
+    A prompt that was never recorded raises ``CassetteMiss``, which the
+    client treats like any other failed call.
+    """
+
+    def __init__(self, cassette: Cassette, model_name: str) -> None:
+        self._cassette = cassette
+        self._model_name = model_name
+
+    async def generate_content_async(
+        self, prompt: str, generation_config: Any = None, stream: bool = False
+    ) -> Any:
+        key = llm_key(self._model_name, prompt)
+        entry = self._cassette.next("llm", key)
+        if entry is None:
+            raise self._cassette.miss("llm", key)
+        usage = SimpleNamespace(**entry.get("usage", {}))
+        if entry.get("error") == "resource_exhausted":
+            await self._cassette.pause(entry.get("latency"))
+            raise ResourceExhausted(entry.get("message", "Recorded quota error"))
+        if stream:
+            return _ReplayStream(entry, self._cassette, usage)
+        await self._cassette.pause(entry.get("latency"))
+        return SimpleNamespace(text=entry.get("text"), usage_metadata=usage)
+
+
+class _ReplayStream:
+    """Re-yields recorded chunks, spread over the recorded stream duration."""
+
+    def __init__(self, entry: Dict[str, Any], cassette: Cassette, usage: Any) -> None:
+        self._chunks = entry.get("chunks") or [entry.get("text") or ""]
+        self._first_chunk = entry.get("first_chunk", entry.get("latency", 0.0))
+        self._rest = max(0.0, entry.get("latency", 0.0) - self._first_chunk)
+        self._cassette = cassette
+        self.usage_metadata = usage
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        gap = self._rest / max(1, len(self._chunks) - 1)
+        for index, chunk in enumerate(self._chunks):
+            await self._cassette.pause(self._first_chunk if index == 0 else gap)
+            yield SimpleNamespace(text=chunk)
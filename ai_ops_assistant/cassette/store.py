@@ -0,0 +1,238 @@
+"""Append-only cassette of recorded traffic with an indexed replay lookup."""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when nothing was recorded for a call."""
+
+    def __init__(self, kind: str, key: str) -> None:
+        super().__init__(f"No recorded {kind} response for {key}")
+        self.kind = kind
+        self.key = key
+
+
+def _scan(handle: BinaryIO, start: int, compressed: bool) -> Iterator[Tuple[int, int, int, bytes]]:
+    """Yield ``(offset, length, part, line)`` for each complete record after ``start``.
+
+    Plain cassettes have one record per line. Compressed cassettes are a
+    series of gzip members; ``offset``/``length`` locate the member and
+    ``part`` is the line within it (the recorder writes one per member).
+    A trailing record that is still being written is not yielded.
+    """
+    handle.seek(start)
+    offset = start
+    if not compressed:
+        for line in handle:
+            if not line.endswith(b"\n"):
+                return
+            if line.strip():
+                yield offset, len(line), 0, line
+            offset += len(line)
+        return
+    pending = b""
+    while True:
+        decompressor = zlib.decompressobj(wbits=31)
+        parts = []
+        consumed = 0
+        while not decompressor.eof:
+            if not pending:
+                pending = handle.read(64 * 1024)
+                if not pending:
+                    return
+            parts.append(decompressor.decompress(pending))
+            if decompressor.eof:
+                consumed += len(pending) - len(decompressor.unused_data)
+                pending = decompressor.unused_data
+            else:
+                consumed += len(pending)
+                pending = b""
+        for part, line in enumerate(b"".join(parts).splitlines()):
+            if line.strip():
+                yield offset, consumed, part, line
+        offset += consumed
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream every record of a cassette in recorded order."""
+    with open(path, "rb") as handle:
+        for _, _, _, line in _scan(handle, 0, path.endswith(".gz")):
+            yield json.loads(line)
+
+
+class Cassette:
+    """Records upstream traffic to a JSONL file and serves it back in replay.
+
+    Each record is one JSON line: ``{"kind", "key", "ts", "latency", ...}``.
+    With a ``.gz`` path every record is its own gzip member. The file is
+    then still an ordinary gzipped JSONL stream, and any record can be
+    decompressed on its own.
+
+    In replay mode, a SQLite index maps each key to its records' byte
+    offsets (``<path>.index``). It is built on first open and extended when
+    the cassette grows. So a large cassette opens quickly, and only the
+    records actually used are read from disk. Calls with the same key get
+    the recorded responses in order, starting over after the last one.
+    ``speed`` scales recorded latencies: 1 reproduces them, 10 replays ten
+    times faster, and 0 does not wait at all.
+    """
+
+    def __init__(self, path: str, mode: str = "record", speed: float = 0.0) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', not {mode!r}")
+        self._path = path
+        self._mode = mode
+        self._speed = speed
+        self._compressed = path.endswith(".gz")
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, int] = {}
+        self._recorded = 0
+        self._replayed = 0
+        self._misses = 0
+        self._writer: Optional[BinaryIO] = None
+        self._reader: Optional[BinaryIO] = None
+        self._index: Optional[sqlite3.Connection] = None
+        if mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._writer = open(path, "ab")
+        else:
+            self._reader = open(path, "rb")
+            self._index = self._open_index()
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """Build a cassette from ``CASSETTE_*`` variables, or None when off."""
+        mode = os.getenv("CASSETTE_MODE", "off").lower()
+        if mode not in MODES:
+            raise ValueError(f"CASSETTE_MODE must be one of {MODES}, not {mode!r}")
+        if mode == "off":
+            return None
+        return cls(
+            os.getenv("CASSETTE_PATH", ".cache/cassette.jsonl.gz"),
+            mode=mode,
+            speed=float(os.getenv("CASSETTE_SPEED", "0")),
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self._mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self._mode == "replay"
+
+    def record(self, kind: str, key: str, entry: Dict[str, Any]) -> None:
+        """Append one record; a no-op unless recording."""
+        if self._writer is None:
+            return
+        record = {"kind": kind, "key": key, "ts": round(time.time(), 3), **entry}
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode() + b"\n"
+        data = gzip.compress(line, mtime=0) if self._compressed else line
+        with self._lock:
+            self._writer.write(data)
+            self._writer.flush()
+            self._recorded += 1
+
+    def next(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        """Return the next recorded entry for ``key``, or None if there is none."""
+        if self._index is None:
+            return None
+        indexed = f"{kind}:{key}"
+        with self._lock:
+            position = self._cursors.get(indexed, 0)
+            row = self._locate(indexed, position)
+            if row is None and position:
+                position = 0
+                row = self._locate(indexed, position)
+            if row is None:
+                return None
+            self._cursors[indexed] = position + 1
+            self._replayed += 1
+            offset, length, part = row
+            self._reader.seek(offset)
+            data = self._reader.read(length)
+        if self._compressed:
+            data = gzip.decompress(data)
+        return json.loads(data.splitlines()[part])
+
+    def miss(self, kind: str, key: str) -> CassetteMiss:
+        """Count an unrecorded call and return the error to raise for it."""
+        with self._lock:
+            self._misses += 1
+        return CassetteMiss(kind, key)
+
+    async def pause(self, latency: Optional[float]) -> None:
+        """Wait out a recorded latency, scaled by ``speed`` (no wait at speed 0)."""
+        if self._speed > 0 and latency:
+            await asyncio.sleep(latency / self._speed)
+
+    def close(self) -> None:
+        for handle in (self._writer, self._reader):
+            if handle is not None:
+                handle.close()
+        if self._index is not None:
+            self._index.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the mode and how many records were written, served or missing."""
+        with self._lock:
+            return {
+                "mode": self._mode,
+                "path": self._path,
+                "speed": self._speed,
+                "recorded": self._recorded,
+                "replayed": self._replayed,
+                "misses": self._misses,
+            }
+
+    def _locate(self, indexed: str, position: int) -> Optional[Tuple[int, int, int]]:
+        return self._index.execute(
+            "SELECT offset, length, part FROM records WHERE key = ? ORDER BY seq LIMIT 1 OFFSET ?",
+            (indexed, position),
+        ).fetchone()
+
+    def _open_index(self) -> sqlite3.Connection:
+        """Open the sidecar index and add any records appended since it was built."""
+        conn = sqlite3.connect(f"{self._path}.index", isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "seq INTEGER PRIMARY KEY, key TEXT NOT NULL, "
+            "offset INTEGER NOT NULL, length INTEGER NOT NULL, part INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS records_key ON records (key, seq)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        row = conn.execute("SELECT value FROM meta WHERE name = 'indexed_bytes'").fetchone()
+        start = row[0] if row else 0
+        if start > os.path.getsize(self._path):
+            # The cassette was replaced by a shorter one; rebuild from scratch.
+            conn.execute("DELETE FROM records")
+            start = 0
+        end = start
+        conn.execute("BEGIN")
+        for offset, length, part, line in _scan(self._reader, start, self._compressed):
+            record = json.loads(line)
+            conn.execute(
+                "INSERT INTO records (key, offset, length, part) VALUES (?, ?, ?, ?)",
+                (f"{record['kind']}:{record['key']}", offset, length, part),
+            )
+            end = offset + length
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES ('indexed_bytes', ?)", (end,)
+        )
+        conn.execute("COMMIT")
+        return conn
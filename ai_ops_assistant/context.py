@@ -0,0 +1,134 @@
+"""Process-wide application context shared across requests."""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import httpx
+
+from ai_ops_assistant.agents.executor import ExecutorAgent
+from ai_ops_assistant.agents.planner import PlannerAgent
+from ai_ops_assistant.agents.router import IntentRouter
+from ai_ops_assistant.agents.verifier import VerifierAgent
+from ai_ops_assistant.cassette.http import RecordingTransport, ReplayTransport
+from ai_ops_assistant.cassette.store import Cassette
+from ai_ops_assistant.llm.cache import ResponseCache
+from ai_ops_assistant.llm.client import LlmClient
+from ai_ops_assistant.llm.prompts import PromptBuilder
+from ai_ops_assistant.runtime.circuit import CircuitBreakers
+from ai_ops_assistant.runtime.ratelimit import RateLimiter
+from ai_ops_assistant.runtime.singleflight import SingleFlight
+from ai_ops_assistant.task_cache import TaskResultCache
+from ai_ops_assistant.tools.cache import ToolResultCache
+from ai_ops_assistant.tools.conditional import ConditionalCache
+from ai_ops_assistant.tools.gazetteer import default_gazetteer
+from ai_ops_assistant.tools.github_tool import GitHubTool
+from ai_ops_assistant.tools.weather_tool import WeatherTool
+
+
+def build_http_client(cassette: Optional[Cassette] = None) -> httpx.AsyncClient:
+    """Create the shared keep-alive HTTP client used by all tools.
+
+    With a ``cassette``, responses are recorded to it or replayed from it.
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+    transport: Optional[httpx.AsyncBaseTransport] = None
+    if cassette is not None and cassette.replaying:
+        transport = ReplayTransport(cassette)
+    elif cassette is not None:
+        # A custom transport replaces the client's own pool, so it gets the limits.
+        transport = RecordingTransport(httpx.AsyncHTTPTransport(limits=limits), cassette)
+    return httpx.AsyncClient(
+        timeout=float(os.getenv("HTTP_TIMEOUT", "10")), limits=limits, transport=transport
+    )
+
+
+class AppContext:
+    """Builds the LLM client, tools and agents once per process.
+
+    Created on application startup and closed on shutdown so that the
+    response cache and HTTP connection pools are reused across requests.
+    """
+
+    def __init__(self) -> None:
+        self.cassette = Cassette.from_env()
+        self.http = build_http_client(self.cassette)
+        self.request_timeout = float(os.getenv("REQUEST_TIMEOUT", "30"))
+        self.max_request_timeout = float(os.getenv("REQUEST_TIMEOUT_MAX", "120"))
+        self.batch_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+        self.batch_max_tasks = int(os.getenv("BATCH_MAX_TASKS", "500"))
+        self.speculative_planning = os.getenv("PLANNER_SPECULATIVE", "true").lower() == "true"
+        self.verify_max_rounds = int(os.getenv("VERIFY_MAX_ROUNDS", "1"))
+        self.verify_max_llm_calls = int(os.getenv("VERIFY_MAX_LLM_CALLS", "6"))
+        self.verify_min_remaining = float(os.getenv("VERIFY_MIN_REMAINING", "5"))
+        self.cache = ResponseCache.from_env()
+        self.llm_flights = SingleFlight()
+        self.tool_flights = SingleFlight()
+        self.limiter = (
+            RateLimiter.from_env()
+            if os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+            else None
+        )
+        self.llm = LlmClient(
+            cache=self.cache, flights=self.llm_flights, limiter=self.limiter, cassette=self.cassette
+        )
+        self.task_cache = (
+            TaskResultCache.from_env()
+            if os.getenv("TASK_CACHE_ENABLED", "false").lower() == "true"
+            else None
+        )
+        self.tool_cache = (
+            ToolResultCache.from_env()
+            if os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+            else None
+        )
+        self.github_conditional = (
+            ConditionalCache.from_env()
+            if os.getenv("GITHUB_CONDITIONAL_REQUESTS", "true").lower() == "true"
+            else None
+        )
+        self.github = GitHubTool(self.http, limiter=self.limiter, conditional=self.github_conditional)
+        self.weather = WeatherTool(
+            self.http,
+            cache=self.tool_cache,
+            limiter=self.limiter,
+            gazetteer=(
+                default_gazetteer()
+                if os.getenv("WEATHER_GAZETTEER", "true").lower() == "true"
+                else None
+            ),
+        )
+        router = (
+            IntentRouter(threshold=float(os.getenv("PLANNER_FAST_PATH_THRESHOLD", "0.8")))
+            if os.getenv("PLANNER_FAST_PATH", "true").lower() == "true"
+            else None
+        )
+        self.breakers = (
+            CircuitBreakers.from_env()
+            if os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+            else None
+        )
+        self.planner = PlannerAgent(self.llm, router=router)
+        self.executor = ExecutorAgent(
+            self.github,
+            self.weather,
+            max_concurrency=int(os.getenv("EXECUTOR_MAX_CONCURRENCY", "4")),
+            global_concurrency=int(os.getenv("EXECUTOR_GLOBAL_CONCURRENCY", "64")),
+            tool_cache=self.tool_cache,
+            flights=self.tool_flights,
+            breakers=self.breakers,
+        )
+        self.verifier = VerifierAgent(self.llm, prompts=PromptBuilder.from_env())
+
+    async def aclose(self) -> None:
+        """Release pooled connections and the persistent cache store."""
+        await self.http.aclose()
+        self.cache.close()
+        if self.github_conditional is not None:
+            self.github_conditional.close()
+        if self.cassette is not None:
+            self.cassette.close()
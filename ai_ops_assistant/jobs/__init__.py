@@ -0,0 +1 @@
+"""Background job queue for running tasks without holding a connection open."""
@@ -0,0 +1,197 @@
+"""Prioritized, bounded job queue served by a pool of async workers."""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from ai_ops_assistant.pipeline import TaskRequest, TaskResponse
+
+if TYPE_CHECKING:
+    from ai_ops_assistant.jobs.sqlite_store import SqliteJobStore
+
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+Priority = Literal["high", "normal", "low"]
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobRequest(TaskRequest):
+    priority: Priority = Field(default="normal", description="Queue priority")
+
+
+class Job(BaseModel):
+    id: str
+    status: JobStatus
+    priority: Priority
+    request: TaskRequest
+    result: Optional[TaskResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobQueue:
+    """Runs submitted tasks on a fixed number of worker coroutines.
+
+    Jobs are taken highest priority first, then in submission order.
+    Submissions are rejected with ``JobQueueFull`` once ``max_queued`` jobs
+    are waiting. Finished jobs are kept for ``retention`` seconds. With a
+    ``store``, every state change is persisted and jobs that were queued
+    or running when the process stopped are queued again on ``start``.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[[TaskRequest], Awaitable[TaskResponse]],
+        workers: int = 4,
+        max_queued: int = 1000,
+        retention: float = 3600.0,
+        store: Optional["SqliteJobStore"] = None,
+    ) -> None:
+        self._runner = runner
+        self._worker_count = workers
+        self._max_queued = max_queued
+        self._retention = retention
+        self._store = store
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._jobs: Dict[str, Job] = {}
+        self._sequence = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._last_prune = time.monotonic()
+        self._running = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._rejected = 0
+        self._recovered = 0
+
+    @classmethod
+    def from_env(cls, runner: Callable[[TaskRequest], Awaitable[TaskResponse]]) -> "JobQueue":
+        """Build a job queue configured from environment variables."""
+        store = None
+        if os.getenv("JOB_BACKEND", "memory").lower() == "sqlite":
+            from ai_ops_assistant.jobs.sqlite_store import SqliteJobStore
+
+            store = SqliteJobStore(os.getenv("JOB_PATH", ".cache/jobs.sqlite3"))
+        return cls(
+            runner,
+            workers=int(os.getenv("JOB_WORKERS", "4")),
+            max_queued=int(os.getenv("JOB_MAX_QUEUED", "1000")),
+            retention=float(os.getenv("JOB_RETENTION", "3600")),
+            store=store,
+        )
+
+    async def start(self) -> None:
+        """Requeue persisted unfinished jobs and start the workers."""
+        if self._store is not None:
+            for job in await asyncio.to_thread(self._store.unfinished):
+                job.status = "queued"
+                job.started_at = None
+                self._enqueue(job)
+                self._recovered += 1
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self._worker_count)]
+
+    async def stop(self) -> None:
+        """Cancel the workers. Persisted running jobs are retried on next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._store is not None:
+            self._store.close()
+
+    async def submit(self, request: JobRequest) -> Job:
+        """Queue a task, or raise ``JobQueueFull`` when at capacity."""
+        if self._queue.qsize() >= self._max_queued:
+            self._rejected += 1
+            raise JobQueueFull(f"Job queue is full ({self._max_queued} jobs waiting)")
+        job = Job(
+            id=uuid.uuid4().hex,
+            status="queued",
+            priority=request.priority,
+            request=TaskRequest(**request.model_dump(exclude={"priority"})),
+            created_at=time.time(),
+        )
+        await self._save(job)
+        self._enqueue(job)
+        await self._prune()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, including ones finished before a restart."""
+        job = self._jobs.get(job_id)
+        if job is None and self._store is not None:
+            job = await asyncio.to_thread(self._store.load, job_id)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, worker and outcome counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "running": self._running,
+            "workers": self._worker_count,
+            "max_queued": self._max_queued,
+            "succeeded": self._succeeded,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "recovered": self._recovered,
+            "backend": "sqlite" if self._store is not None else "memory",
+        }
+
+    def _enqueue(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._queue.put_nowait((PRIORITIES[job.priority], next(self._sequence), job.id))
+
+    async def _work(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None:
+                continue
+            job.status = "running"
+            job.started_at = time.time()
+            self._running += 1
+            try:
+                await self._save(job)
+                job.result = await self._runner(job.request)
+                job.status = "succeeded"
+                self._succeeded += 1
+            except Exception as exc:
+                job.status = "failed"
+                job.error = str(exc)
+                self._failed += 1
+            finally:
+                self._running -= 1
+            job.finished_at = time.time()
+            await self._save(job)
+
+    async def _save(self, job: Job) -> None:
+        if self._store is not None:
+            await asyncio.to_thread(self._store.save, job)
+
+    async def _prune(self) -> None:
+        """Drop finished jobs older than the retention period (at most once a minute)."""
+        if time.monotonic() - self._last_prune < 60:
+            return
+        self._last_prune = time.monotonic()
+        cutoff = time.time() - self._retention
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self._store is not None:
+            await asyncio.to_thread(self._store.delete_finished_before, cutoff)
@@ -0,0 +1,97 @@
+"""Persistent SQLite store for queued and finished jobs."""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+from ai_ops_assistant.jobs.queue import PRIORITIES, Job
+
+
+class SqliteJobStore:
+    """Keeps jobs on disk so queued work survives a restart.
+
+    Each thread keeps its own connection (the queue calls the store via
+    ``asyncio.to_thread``). Jobs are stored as JSON next to the columns
+    needed to find unfinished work in priority order.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize store.
+
+        Args:
+            path: SQLite database file (created if missing)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, finished_at REAL, body TEXT NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread is disabled so close() can run on shutdown.
+            conn = sqlite3.connect(
+                self._path,
+                timeout=5.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def save(self, job: Job) -> None:
+        """Insert or update a job."""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO jobs (id, status, priority, created_at, finished_at, body) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                job.id,
+                job.status,
+                PRIORITIES[job.priority],
+                job.created_at,
+                job.finished_at,
+                job.model_dump_json(),
+            ),
+        )
+
+    def load(self, job_id: str) -> Optional[Job]:
+        row = self._connect().execute("SELECT body FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def unfinished(self) -> List[Job]:
+        """Return queued and interrupted jobs, highest priority and oldest first."""
+        rows = self._connect().execute(
+            "SELECT body FROM jobs WHERE status IN ('queued', 'running') "
+            "ORDER BY priority, created_at"
+        ).fetchall()
+        return [Job.model_validate_json(row[0]) for row in rows]
+
+    def delete_finished_before(self, timestamp: float) -> int:
+        """Delete jobs that finished before ``timestamp`` (wall-clock time)."""
+        return self._connect().execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (timestamp,)
+        ).rowcount
+
+    def close(self) -> None:
+        """Close all connections opened by this store."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
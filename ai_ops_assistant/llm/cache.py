@@ -1,49 +1,260 @@
-"""Simple in-memory cache for LLM responses to reduce API calls."""
+"""Bounded in-memory cache for LLM responses to reduce API calls."""
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
+import os
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from ai_ops_assistant.llm.sqlite_cache import SqliteCacheStore
+
+DEFAULT_NAMESPACE = "default"
+
+
+def prompt_key(system: str, user: str) -> str:
+    """Create a stable key for a system/user prompt pair."""
+    content = f"{system}|||{user}"
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+@dataclass
+class _Entry:
+    payload: bytes
+    expires_at: float
 
 
 class ResponseCache:
-    """Thread-safe in-memory cache with TTL."""
+    """Thread-safe LRU cache with per-namespace TTLs and size limits.
 
-    def __init__(self, ttl_seconds: int = 3600) -> None:
+    Values are stored as compact JSON bytes so that memory use can be
+    accounted for exactly. Expired entries are dropped lazily on read and
+    by an amortized sweep that runs on writes at most every
+    ``sweep_interval`` seconds. An optional persistent ``store`` acts as a
+    second tier shared across processes and restarts.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        namespace_ttls: Optional[Dict[str, int]] = None,
+        sweep_interval: float = 60.0,
+        store: Optional[SqliteCacheStore] = None,
+    ) -> None:
         """Initialize cache.
-        
+
         Args:
-            ttl_seconds: Time-to-live for cache entries (default: 1 hour)
+            ttl_seconds: Default time-to-live for cache entries (default: 1 hour)
+            max_entries: Maximum number of entries before LRU eviction
+            max_bytes: Maximum total size of stored payloads in bytes
+            namespace_ttls: TTL overrides per namespace (e.g. "planner")
+            sweep_interval: Minimum seconds between expiry sweeps
+            store: Persistent tier consulted on memory misses
         """
-        self._cache: Dict[str, tuple[Any, float]] = {}
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
         self._ttl = ttl_seconds
+        self._namespace_ttls = dict(namespace_ttls or {})
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+        self._expirations = 0
+        self._store = store
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build a cache configured from environment variables."""
+        namespace_ttls = {
+            namespace: int(os.environ[var])
+            for namespace, var in (
+                ("planner", "CACHE_TTL_PLANNER"),
+                ("verify", "CACHE_TTL_VERIFY"),
+                ("finalize", "CACHE_TTL_FINALIZE"),
+            )
+            if os.getenv(var)
+        }
+        store = None
+        backend = os.getenv("CACHE_BACKEND", "memory").lower()
+        if backend == "sqlite":
+            store = SqliteCacheStore(
+                os.getenv("CACHE_PATH", ".cache/llm_cache.sqlite3"),
+                compact_interval=float(os.getenv("CACHE_COMPACT_INTERVAL", "300")),
+            )
+        elif backend != "memory":
+            raise ValueError(f"Unknown CACHE_BACKEND '{backend}' (expected memory or sqlite)")
+        return cls(
+            ttl_seconds=int(os.getenv("CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            namespace_ttls=namespace_ttls,
+            store=store,
+        )
 
     def _make_key(self, system: str, user: str) -> str:
         """Create cache key from prompt."""
-        content = f"{system}|||{user}"
-        return hashlib.sha256(content.encode()).hexdigest()
+        return prompt_key(system, user)
+
+    def ttl_for(self, namespace: str) -> int:
+        """Return the TTL in seconds applied to a namespace."""
+        return self._namespace_ttls.get(namespace, self._ttl)
 
-    def get(self, system: str, user: str) -> Optional[Any]:
-        """Get cached response if available and not expired."""
+    def get(self, system: str, user: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Any]:
+        """Get cached response if available and not expired.
+
+        A memory miss reads the persistent store inline; code running on
+        the event loop should use ``aget`` instead.
+        """
         key = self._make_key(system, user)
-        if key in self._cache:
-            value, timestamp = self._cache[key]
-            if time.time() - timestamp < self._ttl:
-                return value
-            # Expired - remove it
-            del self._cache[key]
-        return None
-
-    def set(self, system: str, user: str, value: Any) -> None:
-        """Cache a response."""
+        done, value = self._get_memory(key, namespace)
+        if done:
+            return value
+        return self._load(key, namespace, self._store.get(key))
+
+    async def aget(self, system: str, user: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Any]:
+        """Like ``get``, but reads the persistent store in a worker thread.
+
+        Memory hits are answered inline. A store read can wait on disk I/O
+        and on SQLite locks held by other workers, so it is kept off the loop.
+        """
+        key = self._make_key(system, user)
+        done, value = self._get_memory(key, namespace)
+        if done:
+            return value
+        return self._load(key, namespace, await asyncio.to_thread(self._store.get, key))
+
+    def set(self, system: str, user: str, value: Any, namespace: str = DEFAULT_NAMESPACE) -> None:
+        """Cache a response, evicting least recently used entries if needed."""
         key = self._make_key(system, user)
-        self._cache[key] = (value, time.time())
+        payload = json.dumps(value, separators=(",", ":"), default=str).encode()
+        if len(payload) > self._max_bytes:
+            return
+        ttl = self.ttl_for(namespace)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self._sweep_interval:
+                self._sweep(now)
+            self._insert(key, payload, now + ttl)
+        if self._store is not None:
+            self._store.set(key, namespace, payload, time.time() + ttl)
 
     def clear(self) -> None:
         """Clear all cached entries."""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
+        if self._store is not None:
+            self._store.clear()
 
     def size(self) -> int:
         """Return number of cached entries."""
         return len(self._cache)
+
+    def sweep(self) -> int:
+        """Drop all expired entries now and return how many were removed."""
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def compact(self) -> int:
+        """Sweep expired entries from memory and the persistent store."""
+        removed = self.sweep()
+        if self._store is not None:
+            removed += self._store.compact()
+        return removed
+
+    def close(self) -> None:
+        """Close the persistent store, if any."""
+        if self._store is not None:
+            self._store.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and current memory use."""
+        store_stats = self._store.stats() if self._store is not None else None
+        def ratio(hits: int, misses: int) -> float:
+            return hits / (hits + misses) if hits + misses else 0.0
+
+        with self._lock:
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+            namespaces = sorted(set(self._hits) | set(self._misses))
+            return {
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": ratio(hits, misses),
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "namespaces": {
+                    name: {
+                        "hits": self._hits.get(name, 0),
+                        "misses": self._misses.get(name, 0),
+                        "hit_ratio": ratio(self._hits.get(name, 0), self._misses.get(name, 0)),
+                        "ttl": self.ttl_for(name),
+                    }
+                    for name in namespaces
+                },
+                "store": store_stats,
+            }
+
+    def _get_memory(self, key: str, namespace: str) -> Tuple[bool, Optional[Any]]:
+        """Look ``key`` up in memory; ``(False, None)`` means ask the store."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                entry = None
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self._hits[namespace] = self._hits.get(namespace, 0) + 1
+                return True, json.loads(entry.payload)
+            if self._store is None:
+                self._misses[namespace] = self._misses.get(namespace, 0) + 1
+                return True, None
+        return False, None
+
+    def _load(self, key: str, namespace: str, stored: Optional[Tuple[bytes, float]]) -> Optional[Any]:
+        """Promote a store entry into memory, counting the hit or miss."""
+        with self._lock:
+            if stored is None:
+                self._misses[namespace] = self._misses.get(namespace, 0) + 1
+                return None
+            payload, expires_at = stored
+            self._insert(key, payload, time.monotonic() + expires_at - time.time())
+            self._hits[namespace] = self._hits.get(namespace, 0) + 1
+        return json.loads(payload)
+
+    def _insert(self, key: str, payload: bytes, expires_at: float) -> None:
+        if key in self._cache:
+            self._remove(key)
+        self._cache[key] = _Entry(payload, expires_at)
+        self._bytes += len(payload)
+        while len(self._cache) > self._max_entries or self._bytes > self._max_bytes:
+            oldest = next(iter(self._cache))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._cache.pop(key)
+        self._bytes -= len(entry.payload)
+
+    def _sweep(self, now: float) -> int:
+        expired = [key for key, entry in self._cache.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self._expirations += len(expired)
+        self._last_sweep = now
+        return len(expired)
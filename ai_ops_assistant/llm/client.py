@@ -1,123 +1,280 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
 import os
 import time
-from typing import Any, Optional, Type, TypeVar
+from typing import Any, Callable, Optional, Set, Tuple, Type, TypeVar
 
 import google.generativeai as genai
 from google.api_core.exceptions import ResourceExhausted
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel
 
-from ai_ops_assistant.llm.cache import ResponseCache
+from ai_ops_assistant.cassette.llm import RecordingModel, ReplayModel
+from ai_ops_assistant.cassette.store import Cassette
+from ai_ops_assistant.llm.cache import DEFAULT_NAMESPACE, ResponseCache, prompt_key
+from ai_ops_assistant.llm.models import ModelRouter
+from ai_ops_assistant.llm.prompts import estimate_tokens
+from ai_ops_assistant.llm.structured import IncrementalArrayParser, structured_parser
+from ai_ops_assistant.runtime.deadline import Deadline
+from ai_ops_assistant.runtime.metrics import (
+    LLM_CACHE_HITS,
+    LLM_CALLS,
+    LLM_RESOURCE_EXHAUSTED,
+    LLM_RETRIES,
+    LLM_SECONDS,
+    LLM_TOKENS,
+)
+from ai_ops_assistant.runtime.ratelimit import RateLimiter, RateLimitExceeded
+from ai_ops_assistant.runtime.singleflight import SingleFlight
+from ai_ops_assistant.runtime.trace import current_trace
 
 
 T = TypeVar("T", bound=BaseModel)
 
+logger = logging.getLogger(__name__)
+
 
 class LlmClient:
-    """Gemini client with structured JSON output and rate limit handling."""
+    """Gemini client with structured JSON output and rate limit handling.
+
+    Each stage's model is picked by a ``ModelRouter``; a rate-limited model
+    is failed over to the next one right away instead of backing off.
+    """
 
-    def __init__(self, cache: Optional[ResponseCache] = None) -> None:
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        flights: Optional[SingleFlight] = None,
+        limiter: Optional[RateLimiter] = None,
+        cassette: Optional[Cassette] = None,
+    ) -> None:
         api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
+        self._cassette = cassette
+        if not api_key and not (cassette is not None and cassette.replaying):
             raise ValueError("GEMINI_API_KEY is required")
-        genai.configure(api_key=api_key)
-        self._model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
-        self._model = genai.GenerativeModel(self._model_name)
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.models = ModelRouter.from_env(self._build_model)
         self._max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
         self._retry_delay = float(os.getenv("LLM_RETRY_DELAY", "2.0"))
-        self._cache = cache or ResponseCache(ttl_seconds=int(os.getenv("CACHE_TTL", "3600")))
+        self._cache = cache or ResponseCache.from_env()
         self._enable_cache = os.getenv("ENABLE_CACHE", "true").lower() == "true"
+        self._flights = flights or SingleFlight()
+        self._limiter = limiter
+
+    async def chat_json(
+        self,
+        system: str,
+        user: str,
+        schema: Type[T],
+        stage: str = DEFAULT_NAMESPACE,
+        deadline: Optional[Deadline] = None,
+        on_item: Optional[Callable[[Any], None]] = None,
+    ) -> T:
+        """Generate structured JSON response with retry logic for rate limits.
+
+        ``stage`` names the calling stage (planner, verify, finalize) and is
+        used as the cache namespace. Concurrent identical calls share one
+        Gemini request. The prompt size is recorded in the request trace.
+        With a ``deadline``, the caller waits (including retries) for at most
+        the request's remaining budget and gets ``DeadlineExceeded`` past it.
+        The shared Gemini call itself is not bound to any one caller's
+        deadline, so a coalesced caller with more time left still gets the
+        result when another caller gives up.
+
+        With ``on_item``, the response is streamed and ``on_item`` is called
+        with each element of the schema's list field (e.g. each plan step)
+        as soon as it is complete. A retried attempt streams its elements
+        again, so ``on_item`` must tolerate repeats. Cache hits and callers
+        coalesced onto another call get no ``on_item`` calls.
+        """
+        trace = current_trace().section(stage)
+        trace.update(
+            prompt_chars=len(system) + len(user),
+            prompt_tokens_est=estimate_tokens(system) + estimate_tokens(user),
+            cached=False,
+        )
 
-    def chat_json(self, system: str, user: str, schema: Type[T]) -> T:
-        """Generate structured JSON response with retry logic for rate limits."""
         # Check cache first
         if self._enable_cache:
-            cached = self._cache.get(system, user)
-            if cached:
-                print(f"Cache hit! Saved 1 LLM call")
+            cached = await self._cache.aget(system, user, namespace=stage)
+            if cached is not None:
+                trace["cached"] = True
+                LLM_CACHE_HITS.inc(stage=stage)
+                logger.debug("LLM cache hit", extra={"stage": stage})
                 return schema.model_validate(cached)
-        
+
+        key = f"{stage}:{schema.__name__}:{prompt_key(system, user)}"
+        shared = self._flights.do(
+            key, lambda: self._generate(system, user, schema, stage, on_item)
+        )
+        result = await (deadline.run(shared, stage) if deadline else shared)
+        # Callers may mutate what they get back, so never share one instance.
+        return result.model_copy(deep=True)
+
+    async def _generate(
+        self,
+        system: str,
+        user: str,
+        schema: Type[T],
+        stage: str,
+        on_item: Optional[Callable[[Any], None]] = None,
+    ) -> T:
         prompt = f"{system}\n\n{user}\n\nReturn ONLY valid JSON matching the schema. No extra text."
         
+        # Runs in the context of the first caller, so coalesced callers
+        # are not counted as making a call.
+        trace = current_trace().section(stage)
+        tried: Set[str] = set()
         for attempt in range(self._max_retries):
+            name = self.models.choose(stage, exclude=tried)
             try:
-                response = self._model.generate_content(
-                    prompt,
-                    generation_config={
-                        "temperature": 0,
-                        "response_mime_type": "application/json",
-                    },
-                )
-                content = (response.text or "{}").strip()
-                
-                # Try direct validation first
+                if self._limiter is not None:
+                    # Admission control: queue for Gemini budget or shed.
+                    await self._limiter.acquire("gemini")
+                trace["llm_calls"] = trace.get("llm_calls", 0) + 1
+                trace["model"] = name
+                model = self.models.model(name)
+                parser = structured_parser(schema)
+                started = time.perf_counter()
                 try:
-                    result = schema.model_validate_json(content)
-                    # Cache successful response
-                    if self._enable_cache:
-                        self._cache.set(system, user, result.model_dump())
-                    return result
-                except ValidationError as e:
-                    # If it's a list when we expect an object with "steps", wrap it
-                    try:
-                        payload: Any = json.loads(content)
-                        if isinstance(payload, list) and "steps" in schema.model_fields:
-                            result = schema.model_validate({"steps": payload})
-                            if self._enable_cache:
-                                self._cache.set(system, user, result.model_dump())
-                            return result
-                        # If answer/data/sources are missing but other fields exist, extract what we can
-                        if hasattr(schema, '__name__') and schema.__name__ == 'FinalResponse':
-                            result = self._extract_final_response(payload, schema)
-                            if self._enable_cache:
-                                self._cache.set(system, user, result.model_dump())
-                            return result
-                        raise e
-                    except json.JSONDecodeError:
-                        raise e
-                        
+                    if on_item is None:
+                        response = await model.generate_content_async(
+                            prompt,
+                            generation_config={
+                                "temperature": 0,
+                                "response_mime_type": "application/json",
+                            },
+                        )
+                        content = (response.text or "{}").strip()
+                    else:
+                        content, response = await self._stream(
+                            model, prompt, IncrementalArrayParser(parser.list_field), on_item
+                        )
+                except BaseException as exc:
+                    if isinstance(exc, ResourceExhausted):
+                        outcome = "resource_exhausted"
+                        self.models.rate_limited(name)
+                    elif isinstance(exc, asyncio.CancelledError):
+                        outcome = "cancelled"
+                    else:
+                        outcome = "error"
+                        self.models.record(name, time.perf_counter() - started, ok=False)
+                    LLM_CALLS.inc(stage=stage, model=name, outcome=outcome)
+                    raise
+                finally:
+                    LLM_SECONDS.observe(time.perf_counter() - started, stage=stage, model=name)
+                self.models.record(name, time.perf_counter() - started, ok=True)
+                LLM_CALLS.inc(stage=stage, model=name, outcome="ok")
+                self._record_tokens(stage, response, prompt, content)
+                result = parser.parse(content)
+                await self._store(system, user, result, stage)
+                return result
+            except RateLimitExceeded:
+                raise
             except ResourceExhausted as e:
+                LLM_RESOURCE_EXHAUSTED.inc(stage=stage)
+                tried.add(name)
+                if attempt < self._max_retries - 1 and self.models.has_alternative(stage, tried):
+                    # Another model has quota now; no need to wait out this one.
+                    LLM_RETRIES.inc(stage=stage, reason="failover")
+                    trace["failovers"] = trace.get("failovers", 0) + 1
+                    logger.warning(
+                        "Gemini model %s rate limited; failing over",
+                        name,
+                        extra={"stage": stage, "model": name},
+                    )
+                    continue
                 # Handle rate limit errors with exponential backoff
                 if attempt < self._max_retries - 1:
                     wait_time = self._retry_delay * (2 ** attempt)
-                    print(f"Rate limit hit. Retrying in {wait_time}s... (attempt {attempt + 1}/{self._max_retries})")
-                    time.sleep(wait_time)
+                    LLM_RETRIES.inc(stage=stage, reason="resource_exhausted")
+                    logger.warning(
+                        "Gemini rate limit hit; retrying in %ss (attempt %d/%d)",
+                        wait_time,
+                        attempt + 1,
+                        self._max_retries,
+                        extra={"stage": stage, "wait_s": wait_time},
+                    )
+                    if self._limiter is not None:
+                        # Hold back every queued Gemini call, not just this one.
+                        self._limiter.block("gemini", wait_time)
+                    else:
+                        await asyncio.sleep(wait_time)
                 else:
                     raise ValueError(
                         f"Rate limit exceeded after {self._max_retries} attempts. "
                         "Please wait or upgrade your API quota."
                     ) from e
             except Exception as e:
-                # For other errors, don't retry
+                # Retry other errors (e.g. unparseable output) right away;
+                # the limiter paces the next attempt.
                 if attempt < self._max_retries - 1 and "quota" not in str(e).lower():
-                    time.sleep(1)
+                    LLM_RETRIES.inc(stage=stage, reason="error")
+                    logger.info(
+                        "Retrying LLM call after error: %s",
+                        e,
+                        extra={"stage": stage, "attempt": attempt + 1},
+                    )
                     continue
                 raise
         
         raise ValueError("Failed to generate response after all retries")
     
-    def _extract_final_response(self, payload: Any, schema: Type[T]) -> T:
-        """Extract FinalResponse from non-standard Gemini output."""
-        if isinstance(payload, dict):
-            # Try to find answer-like fields
-            answer = (
-                payload.get('answer') or 
-                payload.get('summary') or 
-                payload.get('result') or
-                payload.get('response') or
-                payload.get('message') or
-                str(payload)
+    async def _stream(
+        self,
+        model: Any,
+        prompt: str,
+        items: IncrementalArrayParser,
+        on_item: Callable[[Any], None],
+    ) -> Tuple[str, Any]:
+        """Stream a response, reporting completed list elements as they arrive.
+
+        Returns the full text and the response object (for its usage metadata).
+        """
+        response = await model.generate_content_async(
+            prompt,
+            generation_config={
+                "temperature": 0,
+                "response_mime_type": "application/json",
+            },
+            stream=True,
+        )
+        parts = []
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. the final finish-reason chunk).
+                continue
+            parts.append(text)
+            for item in items.feed(text):
+                on_item(item)
+        return "".join(parts).strip() or "{}", response
+
+    def _build_model(self, name: str) -> Any:
+        """Create the model behind ``name``, recording or replaying it with a cassette."""
+        if self._cassette is not None and self._cassette.replaying:
+            return ReplayModel(self._cassette, name)
+        model = genai.GenerativeModel(name)
+        if self._cassette is not None:
+            return RecordingModel(model, self._cassette, name)
+        return model
+
+    @staticmethod
+    def _record_tokens(stage: str, response: Any, prompt: str, content: str) -> None:
+        """Count prompt/response tokens, estimating them if Gemini reports no usage."""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt)
+        response_tokens = getattr(usage, "candidates_token_count", 0) or estimate_tokens(content)
+        LLM_TOKENS.inc(prompt_tokens, stage=stage, kind="prompt")
+        LLM_TOKENS.inc(response_tokens, stage=stage, kind="response")
+
+    async def _store(self, system: str, user: str, result: BaseModel, stage: str) -> None:
+        """Cache a successful response without blocking the event loop."""
+        if self._enable_cache:
+            # Off the loop: the persistent tier may wait on SQLite locks.
+            await asyncio.to_thread(
+                self._cache.set, system, user, result.model_dump(), namespace=stage
             )
-            data = payload.get('data', payload.get('details', {}))
-            if isinstance(data, list):
-                data = {"items": data}
-            sources = payload.get('sources', payload.get('tools_used', []))
-            
-            return schema.model_validate({
-                'answer': answer,
-                'data': data if isinstance(data, dict) else {},
-                'sources': sources if isinstance(sources, list) else []
-            })
-        return schema.model_validate({'answer': str(payload), 'data': {}, 'sources': []})
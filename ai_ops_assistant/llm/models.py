@@ -0,0 +1,181 @@
+"""Per-stage Gemini model selection with latency- and error-aware failover."""
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Collection, Deque, Dict, List, Optional, Sequence, Tuple
+
+
+STAGES = ("planner", "verify", "finalize")
+
+
+class ModelHealth:
+    """Rolling latency and error rate of one model over its recent calls.
+
+    Only calls from the last ``window_seconds`` count, so a model that was
+    slow or failing becomes eligible again once it has had no traffic for
+    that long.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, max_calls: int = 100) -> None:
+        self._window = window_seconds
+        self._calls: Deque[Tuple[float, float, bool]] = deque(maxlen=max_calls)
+        self._cooling_until = 0.0
+        self._served = 0
+        self._errors = 0
+        self._cooldowns = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self._calls.append((time.monotonic(), latency, ok))
+        self._served += ok
+        self._errors += not ok
+
+    def cool_down(self, seconds: float) -> None:
+        """Skip this model for ``seconds`` (after a quota error)."""
+        self._cooling_until = max(self._cooling_until, time.monotonic() + seconds)
+        self._cooldowns += 1
+
+    @property
+    def cooling(self) -> bool:
+        return time.monotonic() < self._cooling_until
+
+    def window(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - self._window
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+        return list(self._calls)
+
+    def summary(self) -> Tuple[int, float, float]:
+        """Return ``(calls, mean latency of successful calls, error rate)`` in the window."""
+        calls = self.window()
+        latencies = [latency for _, latency, ok in calls if ok]
+        mean = sum(latencies) / len(latencies) if latencies else 0.0
+        errors = sum(1 for _, _, ok in calls if not ok)
+        return len(calls), mean, errors / len(calls) if calls else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        calls, mean, error_rate = self.summary()
+        return {
+            "served": self._served,
+            "errors": self._errors,
+            "cooldowns": self._cooldowns,
+            "cooling": self.cooling,
+            "window_calls": calls,
+            "window_mean_latency_s": round(mean, 3),
+            "window_error_rate": round(error_rate, 3),
+        }
+
+
+class ModelRouter:
+    """Picks the Gemini model for each stage and fails over between models.
+
+    Each stage tries its own model first (``stages``, else ``default``),
+    then the ``fallbacks`` in order. A model is passed over while it cools
+    down after a ``ResourceExhausted``. It is also passed over while, with
+    at least ``min_calls`` recent calls, its mean latency exceeds
+    ``slow_seconds`` or its error rate exceeds ``max_error_rate``. If no
+    model is healthy, the first one that is not cooling down is used.
+    Model instances are created once by ``factory`` and shared by all stages.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        default: str,
+        stages: Optional[Dict[str, str]] = None,
+        fallbacks: Sequence[str] = (),
+        window_seconds: float = 300.0,
+        min_calls: int = 3,
+        slow_seconds: float = 10.0,
+        max_error_rate: float = 0.5,
+        cooldown_seconds: float = 30.0,
+    ) -> None:
+        self._default = default
+        self._stages = dict(stages or {})
+        self._fallbacks = [name for name in fallbacks if name]
+        self._min_calls = min_calls
+        self._slow_seconds = slow_seconds
+        self._max_error_rate = max_error_rate
+        self._cooldown_seconds = cooldown_seconds
+        names = dict.fromkeys([default, *self._stages.values(), *self._fallbacks])
+        self._models: Dict[str, Any] = {name: factory(name) for name in names}
+        self._health = {name: ModelHealth(window_seconds) for name in names}
+
+    @classmethod
+    def from_env(cls, factory: Callable[[str], Any]) -> "ModelRouter":
+        """Build a router from ``GEMINI_MODEL*`` and ``LLM_MODEL_*`` variables."""
+        return cls(
+            factory,
+            default=os.getenv("GEMINI_MODEL", "gemini-1.5-flash"),
+            stages={
+                stage: os.environ[var]
+                for stage, var in (
+                    ("planner", "GEMINI_MODEL_PLANNER"),
+                    ("verify", "GEMINI_MODEL_VERIFY"),
+                    ("finalize", "GEMINI_MODEL_FINALIZE"),
+                )
+                if os.getenv(var)
+            },
+            fallbacks=[name.strip() for name in os.getenv("GEMINI_FALLBACK_MODELS", "").split(",")],
+            window_seconds=float(os.getenv("LLM_MODEL_WINDOW", "300")),
+            min_calls=int(os.getenv("LLM_MODEL_MIN_CALLS", "3")),
+            slow_seconds=float(os.getenv("LLM_MODEL_SLOW_SECONDS", "10")),
+            max_error_rate=float(os.getenv("LLM_MODEL_MAX_ERROR_RATE", "0.5")),
+            cooldown_seconds=float(os.getenv("LLM_MODEL_COOLDOWN", "30")),
+        )
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._models)
+
+    def model(self, name: str) -> Any:
+        return self._models[name]
+
+    def set_model(self, name: str, model: Any) -> None:
+        """Replace the instance behind ``name`` (e.g. with a fake in benchmarks)."""
+        self._models[name] = model
+
+    def candidates(self, stage: str) -> List[str]:
+        """The stage's models in preference order."""
+        return list(dict.fromkeys([self._stages.get(stage, self._default), *self._fallbacks]))
+
+    def choose(self, stage: str, exclude: Collection[str] = ()) -> str:
+        """Return the model to call for ``stage``, skipping ``exclude`` if possible."""
+        names = [name for name in self.candidates(stage) if name not in exclude] or self.candidates(stage)
+        for name in names:
+            if self._healthy(name):
+                return name
+        for name in names:
+            if not self._health[name].cooling:
+                return name
+        return names[0]
+
+    def has_alternative(self, stage: str, exclude: Collection[str]) -> bool:
+        """Whether a model outside ``exclude`` is available without waiting."""
+        return any(
+            not self._health[name].cooling for name in self.candidates(stage) if name not in exclude
+        )
+
+    def record(self, name: str, latency: float, ok: bool) -> None:
+        self._health[name].record(latency, ok)
+
+    def rate_limited(self, name: str) -> None:
+        """Cool a model down after ``ResourceExhausted``."""
+        self._health[name].record(0.0, False)
+        self._health[name].cool_down(self._cooldown_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stages": {stage: self.candidates(stage) for stage in STAGES},
+            "models": {name: health.stats() for name, health in self._health.items()},
+        }
+
+    def _healthy(self, name: str) -> bool:
+        health = self._health[name]
+        if health.cooling:
+            return False
+        calls, mean, error_rate = health.summary()
+        if calls < self._min_calls:
+            return True
+        return mean <= self._slow_seconds and error_rate <= self._max_error_rate
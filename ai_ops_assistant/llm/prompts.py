@@ -0,0 +1,153 @@
+"""Compact, size-budgeted serialization of plans and tool results for prompts."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from ai_ops_assistant.llm.schemas import Plan, ToolResult
+
+
+logger = logging.getLogger(__name__)
+
+# Output fields worth showing the LLM, per tool. Unlisted tools keep all fields.
+_PROJECTIONS: Dict[str, List[str]] = {
+    "weather_current": ["city", "country", "temperature", "feels_like", "humidity", "conditions"],
+    "weather_batch": ["count", "cities"],
+    "github_repo_details": ["name", "url", "stars", "forks", "open_issues", "language", "description"],
+    "github_search": ["count", "items"],
+}
+_ITEM_FIELDS = ["name", "url", "stars", "description"]
+_CITY_FIELDS = _PROJECTIONS["weather_current"] + ["error"]
+
+# Progressively tighter (max string length, max list items) limits tried until a prompt fits.
+_SHRINK_LEVELS = [(None, None), (200, None), (120, 5), (60, 3), (30, 1)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token for English/JSON)."""
+    return (len(text) + 3) // 4
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _shrink(value: Any, max_string: Optional[int], max_items: Optional[int]) -> Any:
+    if isinstance(value, str) and max_string is not None and len(value) > max_string:
+        return value[: max(max_string - 1, 0)] + "…"
+    if isinstance(value, list):
+        kept = value if max_items is None else value[:max_items]
+        return [_shrink(item, max_string, max_items) for item in kept]
+    if isinstance(value, dict):
+        return {key: _shrink(item, max_string, max_items) for key, item in value.items()}
+    return value
+
+
+def _truncate_middle(text: str, limit: int) -> str:
+    """Cut ``text`` to ``limit`` characters, keeping its last line (e.g. ``"Results: "``)."""
+    if len(text) <= limit:
+        return text
+    if limit <= 1:
+        return text[:limit]
+    tail = text[text.rfind("\n") + 1:][-(limit // 2):]
+    return text[: limit - len(tail) - 1] + "…" + tail
+
+
+class PromptBuilder:
+    """Serializes tool results as compact JSON within a character budget.
+
+    Each result keeps only the fields relevant to its tool. Successful
+    results omit their input, except the search query. If the JSON is over
+    budget, long strings are truncated and long lists shortened step by
+    step. As a last resort the text is cut off at the budget.
+
+    In ``fit``, results are guaranteed ``min_results_share`` of the budget
+    (or less if they need less): an oversized task or plan is cut in the
+    middle first, so a long task cannot squeeze the results out.
+    """
+
+    def __init__(self, max_chars: int = 6000, max_string: int = 300, min_results_share: float = 0.5) -> None:
+        self._max_chars = max_chars
+        self._max_string = max_string
+        self._min_results = int(max_chars * min_results_share)
+
+    @classmethod
+    def from_env(cls) -> "PromptBuilder":
+        """Build a prompt builder configured from environment variables."""
+        return cls(
+            max_chars=int(os.getenv("PROMPT_BUDGET_CHARS", "6000")),
+            max_string=int(os.getenv("PROMPT_MAX_STRING", "300")),
+            min_results_share=float(os.getenv("PROMPT_MIN_RESULTS_SHARE", "0.5")),
+        )
+
+    def plan(self, plan: Plan) -> str:
+        """Serialize plan steps as compact JSON."""
+        return _dumps([{"tool": step.tool, "input": step.input} for step in plan.steps])
+
+    def results(self, results: List[ToolResult], budget: Optional[int] = None) -> str:
+        """Serialize tool results as compact JSON no longer than ``budget`` characters."""
+        budget = self._max_chars if budget is None else budget
+        projected = [self._project(result) for result in results]
+        text = ""
+        for max_string, max_items in _SHRINK_LEVELS:
+            limit = self._max_string if max_string is None else min(max_string, self._max_string)
+            text = _dumps(_shrink(projected, limit, max_items))
+            if len(text) <= budget:
+                return text
+        logger.info(
+            "Tool results of %d chars cut off at %d to fit the prompt budget",
+            len(text),
+            budget,
+            extra={"results_chars": len(text), "budget_chars": budget},
+        )
+        return text[: max(budget - 1, 0)] + "…"
+
+    def fit(self, prefix: str, results: List[ToolResult], suffix: str = "") -> str:
+        """Join ``prefix``, serialized results and ``suffix`` within the budget."""
+        budget = self._max_chars - len(prefix) - len(suffix)
+        if budget < self._min_results:
+            reserve = min(self._min_results, len(self.results(results)))
+            room = max(self._max_chars - len(suffix) - reserve, 0)
+            if len(prefix) > room:
+                logger.warning(
+                    "Prompt prefix of %d chars truncated to %d to leave room for tool results",
+                    len(prefix),
+                    room,
+                    extra={"prefix_chars": len(prefix), "budget_chars": self._max_chars},
+                )
+                prefix = _truncate_middle(prefix, room)
+            budget = self._max_chars - len(prefix) - len(suffix)
+        return f"{prefix}{self.results(results, budget)}{suffix}"
+
+    @staticmethod
+    def _project(result: ToolResult) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"tool": result.tool, "ok": result.success}
+        if not result.success:
+            entry["input"] = result.input
+            entry["error"] = result.output.get("error", result.output)
+            return entry
+        fields = _PROJECTIONS.get(result.tool)
+        output = result.output if fields is None else {
+            key: result.output[key] for key in fields if key in result.output
+        }
+        if result.tool == "github_search":
+            entry["query"] = result.input.get("query")
+            output = {
+                **output,
+                "items": [
+                    {key: item.get(key) for key in _ITEM_FIELDS}
+                    for item in output.get("items", [])
+                ],
+            }
+        if result.tool == "weather_batch":
+            output = {
+                **output,
+                "cities": [
+                    {key: city[key] for key in _CITY_FIELDS if key in city}
+                    for city in output.get("cities", [])
+                ],
+            }
+        entry["output"] = output
+        return entry
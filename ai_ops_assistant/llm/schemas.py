@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from pydantic import AliasChoices, BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field, field_validator
 from pydantic.config import ConfigDict
 
 
@@ -11,10 +11,15 @@ class PlanStep(BaseModel):
 
     tool: str = Field(..., alias="tool_name", description="Tool name")
     input: Dict[str, Any] = Field(default_factory=dict, description="Tool input payload")
+    id: Optional[str] = Field(default=None, description="Step id, defaults to its 1-based position")
+    depends_on: List[str] = Field(
+        default_factory=list,
+        description="Ids of earlier steps whose results this step needs",
+    )
 
 
 class Plan(BaseModel):
-    steps: List[PlanStep]
+    steps: List[PlanStep] = Field(..., description="Ordered steps to complete the task")
 
 
 class ToolResult(BaseModel):
@@ -56,3 +61,43 @@ class VerificationResult(BaseModel):
     missing: List[str]
     suggested_steps: List[PlanStep]
     final_response: FinalResponse
+
+
+class VerificationSchema(BaseModel):
+    """Raw verifier output as returned by the LLM."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    is_complete: bool = Field(
+        ...,
+        description="True if results satisfy the task",
+        validation_alias=AliasChoices(
+            "is_complete",
+            "verification_status",
+            "status",
+            "plan_complete",
+            "completed",
+        ),
+    )
+    missing: List[str] = Field(default_factory=list, description="What is missing")
+    suggested_steps: List[PlanStep] = Field(
+        default_factory=list,
+        description="Extra steps to fill gaps",
+    )
+    final_response: Optional[FinalResponse] = Field(
+        default=None,
+        validation_alias=AliasChoices(
+            "final_response",
+            "response",
+            "final",
+            "final_answer",
+            "answer",
+        ),
+    )
+
+    @field_validator("is_complete", mode="before")
+    @classmethod
+    def _normalize_status(cls, value):
+        if isinstance(value, str):
+            return value.strip().lower() in {"complete", "true", "yes", "ok", "done"}
+        return value
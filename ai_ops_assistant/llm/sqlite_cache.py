@@ -0,0 +1,148 @@
+"""Persistent SQLite store for LLM responses shared across processes."""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SqliteCacheStore:
+    """On-disk cache tier backed by SQLite in WAL mode.
+
+    WAL lets any number of uvicorn workers read concurrently while one of
+    them writes, so entries survive restarts and are shared between
+    processes. Each thread keeps its own connection. Expiry uses wall-clock
+    time so that all processes agree on it.
+
+    The row count in ``stats`` is kept in memory: counted once on open,
+    then adjusted by this process's writes, so rows written by other
+    processes since then are not included.
+    """
+
+    def __init__(self, path: str, compact_interval: float = 300.0) -> None:
+        """Initialize store.
+
+        Args:
+            path: SQLite database file (created if missing)
+            compact_interval: Minimum seconds between automatic compactions
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._path = path
+        self._compact_interval = compact_interval
+        self._last_compact = time.monotonic()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._compacted = 0
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, "
+            "payload BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires ON llm_cache (expires_at)")
+        self._rows = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Connections are only used by the thread that opened them;
+            # check_same_thread is disabled so close() can run on shutdown.
+            conn = sqlite3.connect(
+                self._path,
+                timeout=5.0,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Return ``(payload, expires_at)`` for a live entry, else None."""
+        row = self._connect().execute(
+            "SELECT payload, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return bytes(row[0]), row[1]
+
+    def set(self, key: str, namespace: str, payload: bytes, expires_at: float) -> None:
+        """Insert or replace an entry; ``expires_at`` is a wall-clock time."""
+        conn = self._connect()
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO llm_cache (key, namespace, payload, expires_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, namespace, payload, expires_at),
+        ).rowcount
+        if inserted:
+            with self._lock:
+                self._rows += 1
+        else:
+            conn.execute(
+                "UPDATE llm_cache SET namespace = ?, payload = ?, expires_at = ? WHERE key = ?",
+                (namespace, payload, expires_at, key),
+            )
+        if time.monotonic() - self._last_compact >= self._compact_interval:
+            self.compact()
+
+    def clear(self) -> None:
+        """Delete all entries."""
+        self._connect().execute("DELETE FROM llm_cache")
+        with self._lock:
+            self._rows = 0
+
+    def compact(self, vacuum: bool = False) -> int:
+        """Delete expired rows and checkpoint the WAL.
+
+        Args:
+            vacuum: Also rebuild the database file to reclaim disk space
+        """
+        self._last_compact = time.monotonic()
+        conn = self._connect()
+        removed = conn.execute(
+            "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if vacuum:
+            conn.execute("VACUUM")
+        with self._lock:
+            self._compacted += removed
+            self._rows = max(0, self._rows - removed)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return row count and hit/miss counters for this process.
+
+        Cheap enough for every ``/stats`` and ``/metrics`` scrape: nothing
+        here touches the database.
+        """
+        with self._lock:
+            return {
+                "path": self._path,
+                "rows": self._rows,
+                "hits": self._hits,
+                "misses": self._misses,
+                "compacted": self._compacted,
+            }
+
+    def close(self) -> None:
+        """Close all connections opened by this store."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
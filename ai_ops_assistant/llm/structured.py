@@ -0,0 +1,185 @@
+"""Single-pass lenient parsing of LLM JSON output into validated models."""
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, Generic, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+from pydantic_core import from_json
+
+from ai_ops_assistant.llm.schemas import FinalResponse
+
+
+T = TypeVar("T", bound=BaseModel)
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json|JSON)?\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+def parse_json_lenient(text: str) -> Any:
+    """Parse JSON, repairing common LLM quirks only if the strict parse fails.
+
+    Repairs: markdown code fences, prose around the JSON value and trailing
+    commas before a closing bracket.
+    """
+    try:
+        return from_json(text)
+    except ValueError:
+        pass
+    repaired = text.strip()
+    fenced = _CODE_FENCE.match(repaired)
+    if fenced:
+        repaired = fenced.group(1)
+    starts = [index for index in (repaired.find("{"), repaired.find("[")) if index >= 0]
+    if starts:
+        start = min(starts)
+        end = max(repaired.rfind("}"), repaired.rfind("]"))
+        if end > start:
+            repaired = repaired[start:end + 1]
+    repaired = _TRAILING_COMMA.sub(r"\1", repaired)
+    return from_json(repaired)
+
+
+class IncrementalArrayParser:
+    """Yields elements of a JSON array while the document is still streaming.
+
+    The watched array is the value of ``field`` in the root object, or the
+    root itself if it is a list. Each object or array element is parsed and
+    returned by ``feed`` as soon as its closing bracket arrives, so callers
+    can act on it before the rest of the document has been generated.
+    """
+
+    def __init__(self, field: Optional[str]) -> None:
+        self._key = re.compile(rf'"{re.escape(field)}"\s*:\s*$') if field else None
+        self._text = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._array_depth: Optional[int] = None
+        self._start: Optional[int] = None
+        self._done = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add streamed text and return the elements it completed."""
+        position = len(self._text)
+        self._text += chunk
+        items: List[Any] = []
+        text = self._text
+        for index in range(position, len(text)):
+            if self._done:
+                break
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if self._array_depth is None:
+                    if char == "[" and self._is_target(index):
+                        self._array_depth = len(self._stack) + 1
+                elif len(self._stack) == self._array_depth and self._start is None:
+                    self._start = index
+                self._stack.append(char)
+            elif char in "]}" and self._stack:
+                self._stack.pop()
+                if self._array_depth is None:
+                    continue
+                if len(self._stack) < self._array_depth:
+                    self._done = True
+                elif len(self._stack) == self._array_depth and self._start is not None:
+                    try:
+                        items.append(from_json(text[self._start:index + 1]))
+                    except ValueError:
+                        pass
+                    self._start = None
+        return items
+
+    def _is_target(self, index: int) -> bool:
+        if not self._stack:
+            return True
+        return (
+            self._key is not None
+            and self._stack == ["{"]
+            and self._key.search(self._text, max(0, index - 64), index) is not None
+        )
+
+
+def _coerce_final_response(payload: Any) -> Dict[str, Any]:
+    """Map non-standard Gemini output onto FinalResponse fields."""
+    if not isinstance(payload, dict):
+        return {"answer": str(payload), "data": {}, "sources": []}
+    answer = (
+        payload.get("answer")
+        or payload.get("summary")
+        or payload.get("result")
+        or payload.get("response")
+        or payload.get("message")
+        or str(payload)
+    )
+    data = payload.get("data", payload.get("details", {}))
+    if isinstance(data, list):
+        data = {"items": data}
+    sources = payload.get("sources", payload.get("tools_used", []))
+    return {
+        "answer": answer if isinstance(answer, str) else json.dumps(answer, default=str),
+        "data": data if isinstance(data, dict) else {},
+        "sources": sources if isinstance(sources, list) else [],
+    }
+
+
+# Last-resort payload rewrites per schema, applied when validation fails.
+_FALLBACKS: Dict[Type[BaseModel], Callable[[Any], Any]] = {
+    FinalResponse: _coerce_final_response,
+}
+
+
+class StructuredParser(Generic[T]):
+    """Parses and validates LLM output for one schema.
+
+    The text is parsed once. The result is then adjusted as a Python
+    object: a bare list is wrapped into the schema's single required list
+    field (e.g. ``Plan.steps``), and a schema-specific fallback runs if
+    validation fails. Validation reuses the schema's compiled pydantic
+    validator.
+    """
+
+    def __init__(self, schema: Type[T]) -> None:
+        self._schema = schema
+        self._validate = schema.__pydantic_validator__.validate_python
+        list_fields = [
+            name
+            for name, field in schema.model_fields.items()
+            if field.is_required() and getattr(field.annotation, "__origin__", None) is list
+        ]
+        self._wrap_field: Optional[str] = list_fields[0] if len(list_fields) == 1 else None
+        self._fallback = _FALLBACKS.get(schema)
+
+    @property
+    def list_field(self) -> Optional[str]:
+        """The schema's single required list field (e.g. ``Plan.steps``), if any."""
+        return self._wrap_field
+
+    def parse(self, text: str) -> T:
+        payload = parse_json_lenient(text)
+        if isinstance(payload, list) and self._wrap_field:
+            payload = {self._wrap_field: payload}
+        try:
+            return self._validate(payload)
+        except ValidationError:
+            if self._fallback is None:
+                raise
+            return self._validate(self._fallback(payload))
+
+
+@lru_cache(maxsize=None)
+def structured_parser(schema: Type[T]) -> StructuredParser[T]:
+    """Return the shared parser for a schema, building it on first use."""
+    return StructuredParser(schema)
@@ -1,81 +1,285 @@
 from __future__ import annotations
 
-import os
-from typing import Dict, Any
+import json
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, List, Optional, Union
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
+from pydantic import BaseModel
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from ai_ops_assistant.agents.executor import ExecutorAgent
-from ai_ops_assistant.agents.planner import PlannerAgent
-from ai_ops_assistant.agents.verifier import VerifierAgent
-from ai_ops_assistant.llm.client import LlmClient
-from ai_ops_assistant.llm.schemas import FinalResponse
-from ai_ops_assistant.tools.github_tool import GitHubTool
-from ai_ops_assistant.tools.weather_tool import WeatherTool
+from ai_ops_assistant.context import AppContext
+from ai_ops_assistant.jobs.queue import Job, JobQueue, JobQueueFull, JobRequest
+from ai_ops_assistant.pipeline import (
+    BatchRequest,
+    BatchResponse,
+    PipelineEvent,
+    TaskPipeline,
+    TaskRequest,
+    TaskResponse,
+)
+from ai_ops_assistant.runtime.deadline import DeadlineExceeded
+from ai_ops_assistant.runtime.logs import configure_logging
+from ai_ops_assistant.runtime.metrics import (
+    REGISTRY,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+    Counter,
+    Gauge,
+)
+from ai_ops_assistant.runtime.ratelimit import RateLimitExceeded
 
 
-class TaskRequest(BaseModel):
-    task: str = Field(..., description="Natural language task")
-    skip_verification: bool = Field(
-        default=True, 
-        description="Skip verification step to save LLM calls (faster, uses less quota)"
-    )
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Build shared clients on startup and release them on shutdown."""
+    context = AppContext()
+    app.state.context = context
+    app.state.pipeline = TaskPipeline(context)
+    app.state.jobs = JobQueue.from_env(app.state.pipeline.run)
+    await app.state.jobs.start()
+    try:
+        yield
+    finally:
+        await app.state.jobs.stop()
+        await context.aclose()
 
 
-class TaskResponse(BaseModel):
-    result: FinalResponse
-    metadata: Dict[str, Any]
+class RequestMetricsMiddleware:
+    """Tracks in-flight HTTP requests and their latency per route template.
+
+    Implemented as plain ASGI so streamed responses are timed until their
+    last chunk, and labelled by route (``/jobs/{job_id}``) rather than by
+    raw path to keep the number of series bounded.
+    """
+
+    def __init__(self, app: ASGIApp, router: Router) -> None:
+        self._app = app
+        self._router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        route = self._route(scope)
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with REQUESTS_IN_FLIGHT.track(route=route):
+            try:
+                await self._app(scope, receive, send_with_status)
+            finally:
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    route=route,
+                    method=scope["method"],
+                    status=str(status),
+                )
+
+    def _route(self, scope: Scope) -> str:
+        for route in self._router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "other")
+        return "other"
 
 
 def create_app() -> FastAPI:
     load_dotenv()
-    app = FastAPI(title="AI Ops Assistant", version="0.1.0")
+    configure_logging()
+    app = FastAPI(title="AI Ops Assistant", version="0.1.0", lifespan=lifespan)
+    app.add_middleware(RequestMetricsMiddleware, router=app.router)
 
     @app.post("/run", response_model=TaskResponse)
-    def run_task(request: TaskRequest) -> TaskResponse:
+    async def run_task(
+        request: TaskRequest, http_request: Request, response: Response
+    ) -> Union[TaskResponse, Response]:
+        pipeline: TaskPipeline = http_request.app.state.pipeline
+        _record_request(http_request, request)
         try:
-            llm = LlmClient()
-            planner = PlannerAgent(llm)
-            executor = ExecutorAgent(GitHubTool(), WeatherTool())
-            verifier = VerifierAgent(llm)
-
-            # Step 1: Plan (1 LLM call)
-            plan = planner.plan(request.task)
-            
-            # Step 2: Execute tools (no LLM calls)
-            results = executor.execute(plan.steps)
-            
-            # Step 3: Optimize - skip verification for simple tasks
-            if request.skip_verification:
-                # Only 2 LLM calls total: plan + finalize
-                final_response = verifier.finalize(request.task, plan, results)
-            else:
-                # Full verification (3-4 LLM calls)
-                verification = verifier.verify(request.task, plan, results)
-
-                if not verification.is_complete and verification.suggested_steps:
-                    extra_results = executor.execute(verification.suggested_steps)
-                    results.extend(extra_results)
-                    final_response = verifier.finalize(request.task, plan, results)
-                elif not verification.final_response.answer:
-                    final_response = verifier.finalize(request.task, plan, results)
-                else:
-                    final_response = verification.final_response
-
-            return TaskResponse(
-                result=final_response,
-                metadata={
-                    "steps": [step.model_dump() for step in plan.steps],
-                    "tools_used": [res.tool for res in results],
-                    "verification_skipped": request.skip_verification,
-                },
+            result, etag = await pipeline.run_cached(request)
+            if etag is not None:
+                if _etag_matches(http_request.headers.get("if-none-match"), etag):
+                    return Response(status_code=304, headers={"ETag": etag})
+                response.headers["ETag"] = etag
+            return result
+        except Exception as exc:
+            raise _http_error(exc) from exc
+
+    @app.post("/run/batch", response_model=BatchResponse)
+    async def run_batch(batch: BatchRequest, http_request: Request) -> BatchResponse:
+        """Run many tasks at once, executing shared tool calls only once."""
+        context: AppContext = http_request.app.state.context
+        if len(batch.tasks) > context.batch_max_tasks:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch has {len(batch.tasks)} tasks; the limit is {context.batch_max_tasks}",
             )
+        pipeline: TaskPipeline = http_request.app.state.pipeline
+        _record_request(http_request, batch)
+        try:
+            return await pipeline.run_batch(batch)
         except Exception as exc:
-            raise HTTPException(status_code=500, detail=str(exc)) from exc
+            raise _http_error(exc) from exc
+
+    @app.post("/run/stream")
+    async def run_task_stream(request: TaskRequest, http_request: Request) -> StreamingResponse:
+        """Stream plan, tool results, verification and the final response as SSE."""
+        pipeline: TaskPipeline = http_request.app.state.pipeline
+        _record_request(http_request, request)
+
+        async def events() -> AsyncIterator[str]:
+            try:
+                async for event in pipeline.stream(request):
+                    yield _format_sse(event)
+            except Exception as exc:
+                yield _format_sse(PipelineEvent(event="error", data={"detail": str(exc)}))
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.post("/jobs", response_model=Job, status_code=202)
+    async def submit_job(request: JobRequest, http_request: Request) -> Job:
+        """Queue a task and return its id; poll ``GET /jobs/{id}`` for the result."""
+        jobs: JobQueue = http_request.app.state.jobs
+        _record_request(http_request, request)
+        try:
+            return await jobs.submit(request)
+        except JobQueueFull as exc:
+            raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "5"}) from exc
+
+    @app.get("/jobs/{job_id}", response_model=Job)
+    async def get_job(job_id: str, http_request: Request) -> Job:
+        jobs: JobQueue = http_request.app.state.jobs
+        job = await jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+        return job
+
+    @app.get("/stats")
+    def stats(http_request: Request) -> Dict[str, Any]:
+        context: AppContext = http_request.app.state.context
+        return {
+            "llm_cache": context.cache.stats(),
+            "llm_models": context.llm.models.stats(),
+            "tool_cache": context.tool_cache.stats() if context.tool_cache else None,
+            "task_cache": context.task_cache.stats() if context.task_cache else None,
+            "github_conditional": (
+                context.github_conditional.stats() if context.github_conditional else None
+            ),
+            "llm_single_flight": context.llm_flights.stats(),
+            "tool_single_flight": context.tool_flights.stats(),
+            "rate_limits": context.limiter.stats() if context.limiter else None,
+            "circuit_breakers": context.breakers.stats() if context.breakers else None,
+            "weather": context.weather.stats(),
+            "jobs": http_request.app.state.jobs.stats(),
+            "cassette": context.cassette.stats() if context.cassette else None,
+        }
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics(http_request: Request) -> PlainTextResponse:
+        """Expose counters and latency histograms in Prometheus text format."""
+        context: AppContext = http_request.app.state.context
+        return PlainTextResponse(
+            REGISTRY.render(_scrape_metrics(context, http_request.app.state.jobs)),
+            media_type="text/plain; version=0.0.4",
+        )
 
     return app
 
 
+def _scrape_metrics(context: AppContext, jobs: JobQueue) -> List[Union[Counter, Gauge]]:
+    """Turn the components' own stats into metric families at scrape time.
+
+    Caches, single-flight groups and the job queue already count what they
+    do, so reading their ``stats()`` here adds nothing to the request path.
+    """
+    hits = Counter("ai_ops_cache_hits_total", "Cache hits", ["cache", "namespace"])
+    misses = Counter("ai_ops_cache_misses_total", "Cache misses", ["cache", "namespace"])
+    ratio = Gauge("ai_ops_cache_hit_ratio", "Cache hits / lookups since start", ["cache", "namespace"])
+    entries = Gauge("ai_ops_cache_entries", "Entries held in memory", ["cache"])
+    caches = {"llm": context.cache, "tool": context.tool_cache, "task": context.task_cache}
+    for name, cache in caches.items():
+        if cache is None:
+            continue
+        stats = cache.stats()
+        entries.set(stats["entries"], cache=name)
+        for namespace, counts in stats["namespaces"].items():
+            hits.inc(counts["hits"], cache=name, namespace=namespace)
+            misses.inc(counts["misses"], cache=name, namespace=namespace)
+            ratio.set(counts["hit_ratio"], cache=name, namespace=namespace)
+    if context.github_conditional is not None:
+        stats = context.github_conditional.stats()
+        lookups = stats["responses_304"] + stats["responses_200"]
+        hits.inc(stats["responses_304"], cache="github_etag", namespace="conditional")
+        misses.inc(stats["responses_200"], cache="github_etag", namespace="conditional")
+        ratio.set(
+            stats["responses_304"] / lookups if lookups else 0.0,
+            cache="github_etag",
+            namespace="conditional",
+        )
+        entries.set(stats["entries"], cache="github_etag")
+
+    in_flight = Gauge("ai_ops_single_flight_in_flight", "Distinct upstream calls in flight", ["kind"])
+    coalesced = Counter("ai_ops_single_flight_coalesced_total", "Calls that joined one in flight", ["kind"])
+    for kind, flights in (("llm", context.llm_flights), ("tool", context.tool_flights)):
+        stats = flights.stats()
+        in_flight.set(stats["in_flight"], kind=kind)
+        coalesced.inc(stats["coalesced"], kind=kind)
+
+    job_stats = jobs.stats()
+    job_gauge = Gauge("ai_ops_jobs", "Background jobs by state", ["state"])
+    job_gauge.set(job_stats["queued"], state="queued")
+    job_gauge.set(job_stats["running"], state="running")
+    return [hits, misses, ratio, entries, in_flight, coalesced, job_gauge]
+
+
+def _record_request(http_request: Request, body: BaseModel) -> None:
+    """Write an incoming request to the cassette, so the traffic can be replayed."""
+    cassette = http_request.app.state.context.cassette
+    if cassette is not None and cassette.recording:
+        cassette.record("request", http_request.url.path, {"body": body.model_dump(mode="json")})
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches ``etag`` (weak comparison)."""
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def _http_error(exc: Exception) -> HTTPException:
+    """Map a pipeline failure to its HTTP error (503 when shed, 504 past the deadline)."""
+    if isinstance(exc, RateLimitExceeded):
+        return HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+    if isinstance(exc, DeadlineExceeded):
+        return HTTPException(status_code=504, detail=str(exc))
+    return HTTPException(status_code=500, detail=str(exc))
+
+
+def _format_sse(event: PipelineEvent) -> str:
+    payload = json.dumps(jsonable_encoder(event.data), separators=(",", ":"))
+    return f"event: {event.event}\ndata: {payload}\n\n"
+
+
 app = create_app()
@@ -0,0 +1,460 @@
+"""Plan → execute → verify/finalize pipeline shared by all endpoints."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from ai_ops_assistant.agents.executor import StepMemo
+from ai_ops_assistant.batch import merge_plans
+from ai_ops_assistant.context import AppContext
+from ai_ops_assistant.llm.schemas import FinalResponse, Plan, PlanStep, ToolResult
+from ai_ops_assistant.runtime.deadline import Deadline
+from ai_ops_assistant.runtime.singleflight import SingleFlight
+from ai_ops_assistant.runtime.trace import RequestTrace, begin_trace
+from ai_ops_assistant.task_cache import task_key
+from ai_ops_assistant.tools.cache import tool_call_key
+
+
+def _dump_step(step: PlanStep) -> Dict[str, Any]:
+    """Serialize a step, omitting dependency fields the plan did not use."""
+    return step.model_dump(exclude={name for name in ("id", "depends_on") if not getattr(step, name)})
+
+
+def _cut_short(response: TaskResponse) -> bool:
+    """Whether the deadline cut the answer short (fallback finalize or a skipped verify round)."""
+    return any(
+        response.metadata.get(stage, {}).get("deadline_exceeded") for stage in ("verify", "finalize")
+    )
+
+
+def _distinct(results: List[ToolResult]) -> List[ToolResult]:
+    """Drop repeated tool calls so each appears once in verifier/finalizer prompts."""
+    seen: Set[str] = set()
+    distinct: List[ToolResult] = []
+    for result in results:
+        key = tool_call_key(result.tool, result.input)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(result)
+    return distinct
+
+
+class TaskRequest(BaseModel):
+    task: str = Field(..., description="Natural language task")
+    skip_verification: bool = Field(
+        default=True,
+        description="Skip verification step to save LLM calls (faster, uses less quota)"
+    )
+    template_finalize: bool = Field(
+        default=True,
+        description="Render single-tool results from templates instead of an LLM call",
+    )
+    timeout: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Seconds the whole request may take (server default if omitted)",
+    )
+
+
+class TaskResponse(BaseModel):
+    result: FinalResponse
+    metadata: Dict[str, Any]
+
+
+class BatchRequest(BaseModel):
+    tasks: List[TaskRequest] = Field(..., min_length=1, description="Tasks to run together")
+    timeout: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Seconds the whole batch may take (server default if omitted)",
+    )
+
+
+class BatchStats(BaseModel):
+    tasks: int
+    failed: int
+    total_steps: int
+    unique_steps: int
+    llm_calls: int
+    wall_time_s: float
+
+
+class BatchResponse(BaseModel):
+    results: List[Optional[TaskResponse]]
+    errors: Dict[int, str]
+    stats: BatchStats
+
+
+class PipelineEvent(BaseModel):
+    """One incremental update emitted while a task runs."""
+
+    event: str
+    data: Any
+
+
+class TaskPipeline:
+    """Runs a task through the shared agents.
+
+    ``stream`` yields a ``plan`` event as soon as planning finishes, a
+    ``tool_result`` event as each step completes, a ``verification`` event
+    and finally a ``final`` event carrying the ``TaskResponse``. ``run``
+    consumes the same stream and returns only the response. What each
+    stage recorded in the request trace is merged into the metadata.
+
+    Every request gets a ``Deadline`` (``request.timeout``, else the
+    server default, capped at the server maximum) that each stage shares,
+    so a slow stage leaves less time for the ones after it.
+
+    A ``StepMemo`` per request makes each unique tool call run once, across
+    duplicate plan steps and verification rounds. With verification on,
+    up to ``verify_max_rounds`` rounds of verify → run new suggested steps
+    are made. Another round only starts while the request has made fewer
+    than ``verify_max_llm_calls`` LLM calls and has at least
+    ``verify_min_remaining`` seconds left.
+    """
+
+    def __init__(self, context: AppContext) -> None:
+        self._planner = context.planner
+        self._executor = context.executor
+        self._verifier = context.verifier
+        self._default_timeout = context.request_timeout
+        self._max_timeout = context.max_request_timeout
+        self._batch_concurrency = context.batch_concurrency
+        self._speculative = context.speculative_planning
+        self._verify_max_rounds = context.verify_max_rounds
+        self._verify_max_llm_calls = context.verify_max_llm_calls
+        self._verify_min_remaining = context.verify_min_remaining
+        self._task_cache = context.task_cache
+        self._task_flights = SingleFlight()
+        self._refreshing: Set[str] = set()
+        self._background: Set[asyncio.Task] = set()
+
+    async def run(self, request: TaskRequest) -> TaskResponse:
+        response = None
+        async for event in self.stream(request):
+            if event.event == "final":
+                response = event.data
+        if response is None:
+            raise RuntimeError("Pipeline finished without a final response")
+        return response
+
+    async def run_cached(self, request: TaskRequest) -> Tuple[TaskResponse, Optional[str]]:
+        """Run a task through the whole-task cache, returning the response and its ETag.
+
+        Fresh entries are returned as is. Stale entries are returned too, while
+        a background run refreshes them. Misses run the pipeline, with
+        concurrent identical tasks sharing one run. ``metadata.cache`` reports
+        the outcome. Without a task cache this is ``run`` with no ETag.
+        """
+        if self._task_cache is None:
+            return await self.run(request), None
+        key = task_key(request.task, request.skip_verification, request.template_finalize)
+        cached = self._task_cache.get(key)
+        if cached is None:
+            response, etag = await self._task_flights.do(
+                self._flight_key(key, request), lambda: self._run_and_store(key, request)
+            )
+            response = response.model_copy(deep=True)
+            status, age = "miss", 0.0
+        else:
+            if cached.stale:
+                self._refresh(key, request)
+            response = TaskResponse.model_validate(cached.response)
+            etag = cached.etag
+            status, age = ("stale" if cached.stale else "hit"), cached.age
+        response.metadata["cache"] = {"status": status, "age_s": round(age, 1)}
+        return response, etag
+
+    async def _run_and_store(self, key: str, request: TaskRequest) -> Tuple[TaskResponse, Optional[str]]:
+        """Run a task and cache the response unless a tool call failed or it was cut short."""
+        response: Optional[TaskResponse] = None
+        succeeded = True
+        async for event in self.stream(request):
+            if event.event == "tool_result" and not event.data["success"]:
+                succeeded = False
+            elif event.event == "final":
+                response = event.data
+        if response is None:
+            raise RuntimeError("Pipeline finished without a final response")
+        etag = None
+        if succeeded and not _cut_short(response) and self._task_cache is not None:
+            etag = self._task_cache.set(key, response.model_dump(mode="json"))
+        return response, etag
+
+    def _refresh(self, key: str, request: TaskRequest) -> None:
+        """Recompute a stale entry in the background, once per key at a time."""
+        if key in self._refreshing or self._task_cache is None:
+            return
+        self._refreshing.add(key)
+        self._task_cache.record_refresh()
+        task = asyncio.ensure_future(
+            self._task_flights.do(self._flight_key(key, request), lambda: self._run_and_store(key, request))
+        )
+        self._background.add(task)
+
+        def done(finished: asyncio.Task) -> None:
+            self._refreshing.discard(key)
+            self._background.discard(finished)
+            if not finished.cancelled():
+                # A failed refresh keeps serving the stale entry until the hard TTL.
+                finished.exception()
+
+        task.add_done_callback(done)
+
+    async def stream(self, request: TaskRequest) -> AsyncIterator[PipelineEvent]:
+        trace = begin_trace()
+        deadline = self._deadline(request.timeout)
+        memo = StepMemo()
+
+        # Tool calls for steps streamed by the planner start before the plan is complete.
+        speculation = self._executor.speculate(deadline) if self._speculative else None
+        try:
+            # Step 1: Plan (1 LLM call)
+            plan = await self._planner.plan(
+                request.task,
+                deadline=deadline,
+                on_step=speculation.dispatch if speculation else None,
+            )
+            yield PipelineEvent(event="plan", data={"steps": [_dump_step(step) for step in plan.steps]})
+
+            # Step 2: Execute tools (no LLM calls)
+            results: List[ToolResult] = [None] * len(plan.steps)  # type: ignore[list-item]
+            async for index, result in self._executor.execute_iter(
+                plan.steps, deadline, speculation=speculation, memo=memo
+            ):
+                results[index] = result
+                yield self._tool_event(index, result)
+        finally:
+            if speculation is not None:
+                counts = speculation.discard()
+                if counts["dispatched"]:
+                    trace.section("speculation").update(counts)
+
+        async for event in self._complete(request, plan, results, deadline, trace, memo):
+            yield event
+
+    async def run_batch(self, batch: BatchRequest) -> BatchResponse:
+        """Run many tasks, executing each distinct tool call only once.
+
+        Tasks are planned concurrently (cached and fast-path plans cost no
+        LLM call), their steps are merged with ``merge_plans`` and executed
+        together, then each task is verified and finalized on its own. A
+        task that fails is reported in ``errors`` and has no result.
+
+        A task's own ``timeout`` bounds its planning, verification and
+        finalization, within the batch's deadline. The shared tool calls
+        run until the latest task deadline; a task whose deadline passes
+        first gets error results for the calls that have not finished.
+        """
+        started = time.perf_counter()
+        deadline = self._deadline(batch.timeout)
+        requests = batch.tasks
+        deadlines = [
+            deadline.within(request.timeout) if request.timeout else deadline for request in requests
+        ]
+
+        async def plan_one(index: int) -> Tuple[RequestTrace, Plan]:
+            trace = begin_trace()
+            return trace, await self._planner.plan(requests[index].task, deadline=deadlines[index])
+
+        planned = await asyncio.gather(*(plan_one(index) for index in range(len(requests))), return_exceptions=True)
+        errors: Dict[int, str] = {
+            index: str(outcome) for index, outcome in enumerate(planned) if isinstance(outcome, BaseException)
+        }
+        ok = [index for index in range(len(requests)) if index not in errors]
+        plans = [planned[index][1] for index in ok]  # type: ignore[index]
+        steps, mapping = merge_plans(plans)
+
+        # Results are handed to each task as they arrive, so a task stops
+        # waiting for the shared calls at its own deadline.
+        merged: List[asyncio.Future] = [asyncio.get_running_loop().create_future() for _ in steps]
+        execute_deadline = max((deadlines[index] for index in ok), key=Deadline.remaining, default=deadline)
+
+        async def execute() -> None:
+            try:
+                async for index, result in self._executor.execute_iter(
+                    steps, execute_deadline, max_concurrency=self._batch_concurrency
+                ):
+                    merged[index].set_result(result)
+            except Exception as exc:
+                for future in merged:
+                    if not future.done():
+                        future.set_exception(exc)
+
+        async def complete_one(index: int, indices: List[int]) -> TaskResponse:
+            trace, plan = planned[index]  # type: ignore[misc]
+            begin_trace(trace)
+            waiting = [merged[position] for position in indices]
+            if waiting:
+                await asyncio.wait(waiting, timeout=deadlines[index].remaining())
+            results = [
+                merged[position].result() if merged[position].done() else self._late(steps[position])
+                for position in indices
+            ]
+            response = None
+            async for event in self._complete(requests[index], plan, results, deadlines[index], trace):
+                if event.event == "final":
+                    response = event.data
+            return response
+
+        runner = asyncio.ensure_future(execute())
+        try:
+            completed = await asyncio.gather(
+                *(complete_one(index, indices) for index, indices in zip(ok, mapping)),
+                return_exceptions=True,
+            )
+        finally:
+            # Calls still running are only wanted by tasks past their deadline.
+            runner.cancel()
+        responses: List[Optional[TaskResponse]] = [None] * len(requests)
+        for index, outcome in zip(ok, completed):
+            if isinstance(outcome, BaseException):
+                errors[index] = str(outcome)
+            else:
+                responses[index] = outcome
+
+        traces = [planned[index][0] for index in ok]  # type: ignore[index]
+        stats = BatchStats(
+            tasks=len(requests),
+            failed=len(errors),
+            total_steps=sum(len(indices) for indices in mapping),
+            unique_steps=len(steps),
+            llm_calls=sum(
+                section.get("llm_calls", 0)
+                for trace in traces
+                for section in trace.metadata.values()
+                if isinstance(section, dict)
+            ),
+            wall_time_s=round(time.perf_counter() - started, 3),
+        )
+        return BatchResponse(results=responses, errors=errors, stats=stats)
+
+    @staticmethod
+    def _late(step: PlanStep) -> ToolResult:
+        return ToolResult(
+            tool=step.tool,
+            input=step.input,
+            success=False,
+            output={"error": "Task deadline exceeded before the step finished"},
+        )
+
+    def _deadline(self, timeout: Optional[float]) -> Deadline:
+        return Deadline(self._budget(timeout))
+
+    def _budget(self, timeout: Optional[float]) -> float:
+        return min(timeout or self._default_timeout, self._max_timeout)
+
+    def _flight_key(self, key: str, request: TaskRequest) -> str:
+        """Coalesce only runs with the same time budget.
+
+        Otherwise a caller with a long timeout would inherit the leader's
+        short deadline and the answer it cut short.
+        """
+        return f"{key}:{self._budget(request.timeout)}"
+
+    async def _complete(
+        self,
+        request: TaskRequest,
+        plan: Plan,
+        results: List[ToolResult],
+        deadline: Deadline,
+        trace: RequestTrace,
+        memo: Optional[StepMemo] = None,
+    ) -> AsyncIterator[PipelineEvent]:
+        """Verify and finalize executed results, ending with the ``final`` event."""
+        if memo is None:
+            # Batch results ran outside this request's memo; seed it with them.
+            memo = StepMemo()
+            for result in results:
+                memo.remember(result)
+        # Step 3: Optimize - skip verification for simple tasks
+        if request.skip_verification:
+            yield PipelineEvent(event="verification", data={"skipped": True})
+            # At most 2 LLM calls: plan + finalize (fewer with fast path/templates)
+            final_response = await self._verifier.finalize(
+                request.task,
+                plan,
+                _distinct(results),
+                use_template=request.template_finalize,
+                deadline=deadline,
+            )
+        else:
+            # Full verification: verify, run genuinely new suggested steps, repeat.
+            rounds = 0
+            ran_new_steps = False
+            while True:
+                verification = await self._verifier.verify(
+                    request.task, plan, _distinct(results), deadline=deadline
+                )
+                rounds += 1
+                yield PipelineEvent(
+                    event="verification",
+                    data={
+                        "skipped": False,
+                        "round": rounds,
+                        "is_complete": verification.is_complete,
+                        "missing": verification.missing,
+                        "suggested_steps": [_dump_step(step) for step in verification.suggested_steps],
+                    },
+                )
+                new_steps = [] if verification.is_complete else memo.new_steps(verification.suggested_steps)
+                ran_new_steps = bool(new_steps)
+                if not new_steps:
+                    break
+                offset = len(results)
+                extra_results: List[ToolResult] = [None] * len(new_steps)  # type: ignore[list-item]
+                async for index, result in self._executor.execute_iter(new_steps, deadline, memo=memo):
+                    extra_results[index] = result
+                    yield self._tool_event(offset + index, result)
+                results.extend(extra_results)
+                if not self._another_round(rounds, deadline, trace):
+                    if rounds < self._verify_max_rounds and deadline.remaining() < self._verify_min_remaining:
+                        # Cut short by the clock rather than the configured limits.
+                        trace.section("verify")["deadline_exceeded"] = True
+                    break
+            trace.section("verify")["rounds"] = rounds
+
+            if ran_new_steps or not verification.final_response.answer:
+                final_response = await self._verifier.finalize(
+                    request.task,
+                    plan,
+                    _distinct(results),
+                    use_template=request.template_finalize,
+                    deadline=deadline,
+                )
+            else:
+                final_response = verification.final_response
+
+        trace.section("dedup").update(unique_calls=len(memo), deduplicated=memo.deduplicated)
+        trace.section("deadline").update(
+            budget_s=deadline.budget, elapsed_s=round(deadline.elapsed(), 3)
+        )
+        response = TaskResponse(
+            result=final_response,
+            metadata={
+                "steps": [_dump_step(step) for step in plan.steps],
+                "tools_used": [res.tool for res in results],
+                "verification_skipped": request.skip_verification,
+                **trace.metadata,
+            },
+        )
+        yield PipelineEvent(event="final", data=response)
+
+    def _another_round(self, rounds: int, deadline: Deadline, trace: RequestTrace) -> bool:
+        """Whether the call and time budget allow one more verify round."""
+        llm_calls = sum(
+            section.get("llm_calls", 0) for section in trace.metadata.values() if isinstance(section, dict)
+        )
+        return (
+            rounds < self._verify_max_rounds
+            # The next round's verify, plus the finalize after it.
+            and llm_calls + 2 <= self._verify_max_llm_calls
+            and deadline.remaining() >= self._verify_min_remaining
+        )
+
+    @staticmethod
+    def _tool_event(index: int, result: ToolResult) -> PipelineEvent:
+        return PipelineEvent(event="tool_result", data={"index": index, **result.model_dump()})
@@ -0,0 +1 @@
+"""Runtime helpers shared by the LLM client, agents and tools."""
@@ -0,0 +1,130 @@
+"""Circuit breakers that fail fast on upstreams that keep failing."""
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised when a call is refused because its upstream's circuit is open."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f"Circuit open for {name}; upstream is failing")
+        self.name = name
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Failed calls and calls slower than ``slow_call_seconds`` both count as
+    failures. After ``failure_threshold`` of them in a row the circuit opens
+    and ``allow`` refuses calls for ``reset_timeout`` seconds. Then a single
+    probe call is let through: success closes the circuit, failure opens it
+    again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call_seconds: float = 5.0,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._slow_call_seconds = slow_call_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._rejected = 0
+        self._opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may go to the upstream now.
+
+        Every ``True`` must be followed by ``record``; in half-open state it
+        takes the single probe slot until then.
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self._rejected += 1
+        return False
+
+    def record(self, ok: bool, duration: float) -> None:
+        """Record the outcome of a call that ``allow`` let through."""
+        self._probing = False
+        if ok and duration <= self._slow_call_seconds:
+            self._failures = 0
+            self._state = CLOSED
+            return
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state != OPEN:
+                self._opened += 1
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self._opened,
+            "rejected": self._rejected,
+        }
+
+
+class CircuitBreakers:
+    """One circuit breaker per tool, created on first use."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call_seconds: float = 5.0,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._slow_call_seconds = slow_call_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreakers":
+        """Build circuit breakers configured from environment variables."""
+        return cls(
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+            slow_call_seconds=float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "5")),
+        )
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=self._failure_threshold,
+                reset_timeout=self._reset_timeout,
+                slow_call_seconds=self._slow_call_seconds,
+            )
+            self._breakers[name] = breaker
+        return breaker
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: breaker.stats() for name, breaker in self._breakers.items()}
@@ -0,0 +1,62 @@
+"""Per-request deadlines shared by every pipeline stage."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage runs out of the request's time budget."""
+
+    def __init__(self, stage: str) -> None:
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """Absolute point in time by which a request must finish.
+
+    Created once per request and passed down to each stage, which bounds
+    its own work by ``remaining()`` instead of a fixed timeout.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        self.budget = seconds
+        self._started = time.monotonic()
+        self._expires_at = self._started + seconds
+
+    def within(self, seconds: float) -> "Deadline":
+        """A deadline ``seconds`` from now, but never later than this one."""
+        return Deadline(min(seconds, self.remaining()))
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def check(self, stage: str) -> None:
+        """Raise ``DeadlineExceeded`` if no time is left for ``stage``."""
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+    async def run(self, awaitable: Awaitable[T], stage: str) -> T:
+        """Await ``awaitable`` for at most the remaining budget."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(stage)
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(stage) from None
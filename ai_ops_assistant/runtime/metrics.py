@@ -0,0 +1,264 @@
+"""Process-wide counters, gauges and histograms in Prometheus text format."""
+from __future__ import annotations
+
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+
+LabelValues = Tuple[str, ...]
+M = TypeVar("M", bound="_Metric")
+
+# Seconds; covers cache hits (sub-millisecond) up to slow LLM calls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """A named metric family with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """Return ``(name, label names, label values, value)`` for every series."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, names, values, value in self.samples():
+            lines.append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        with self._lock:
+            return [(self.name, self.labelnames, key, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down per label set."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Count the enclosed block as in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        with self._lock:
+            return [(self.name, self.labelnames, key, value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets, plus their sum and count.
+
+    Each observation is one ``bisect`` and an increment, so histograms are
+    cheap enough to leave on for every request.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._bounds = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum.
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self._bounds) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe how long the enclosed block takes, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def timed(self, **labels: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+        """Decorate a coroutine function so each call's duration is observed."""
+
+        def decorate(fn: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            @functools.wraps(fn)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.time(**labels):
+                    return await fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        names = self.labelnames + ("le",)
+        rows: List[Tuple[str, Sequence[str], Sequence[str], float]] = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self._bounds + (math.inf,), counts):
+                    cumulative += count
+                    rows.append((f"{self.name}_bucket", names, key + (_format_value(bound),), cumulative))
+                rows.append((f"{self.name}_sum", self.labelnames, key, self._sums[key]))
+                rows.append((f"{self.name}_count", self.labelnames, key, cumulative))
+        return rows
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them for a scrape."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, extra: Iterable[_Metric] = ()) -> str:
+        """Return every registered family, then ``extra`` ones, in text format."""
+        families = [*self._metrics.values(), *extra]
+        return "\n".join(family.render() for family in families) + "\n"
+
+    def _register(self, metric: M) -> M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "ai_ops_requests_in_flight", "HTTP requests currently being served", ["route"]
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "ai_ops_request_duration_seconds", "HTTP request latency", ["route", "method", "status"]
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "ai_ops_stage_duration_seconds", "Latency of the plan, execute, verify and finalize stages", ["stage"]
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "ai_ops_tool_duration_seconds", "Latency of tool calls by outcome", ["tool", "outcome"]
+)
+LLM_CALLS = REGISTRY.counter(
+    "ai_ops_llm_calls_total", "Gemini requests sent, by stage, model and outcome", ["stage", "model", "outcome"]
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "ai_ops_llm_call_duration_seconds", "Latency of single Gemini requests", ["stage", "model"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "ai_ops_llm_tokens_total", "Prompt and response tokens, by stage", ["stage", "kind"]
+)
+LLM_RETRIES = REGISTRY.counter(
+    "ai_ops_llm_retries_total", "Gemini requests retried, by stage and reason", ["stage", "reason"]
+)
+LLM_RESOURCE_EXHAUSTED = REGISTRY.counter(
+    "ai_ops_llm_resource_exhausted_total", "ResourceExhausted (quota) errors from Gemini", ["stage"]
+)
+LLM_CACHE_HITS = REGISTRY.counter(
+    "ai_ops_llm_cache_hits_total", "LLM calls answered from the response cache", ["stage"]
+)
+
@@ -0,0 +1,180 @@
+"""Client-side token-bucket rate limiting for upstream APIs."""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Mapping, Optional
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than the bucket allows."""
+
+    def __init__(self, upstream: str, retry_after: float) -> None:
+        super().__init__(
+            f"Rate limit budget for {upstream} exhausted; retry in {retry_after:.1f}s"
+        )
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket that admits calls by reserving future tokens.
+
+    ``acquire`` never blocks a thread. It reserves the next free slot and
+    awaits ``asyncio.sleep`` until then, so callers queue in order. If the
+    slot is more than ``max_wait`` seconds away, the call is shed with
+    ``RateLimitExceeded`` instead.
+    """
+
+    def __init__(self, name: str, rate_per_second: float, capacity: float, max_wait: float) -> None:
+        self.name = name
+        self._rate = rate_per_second
+        self._capacity = capacity
+        self._max_wait = max_wait
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._admitted = 0
+        self._delayed = 0
+        self._shed = 0
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Reserve one token and return how long to wait before using it."""
+        now = time.monotonic()
+        self._refill(now)
+        ready_at = self._updated + max(0.0, 1.0 - self._tokens) / self._rate
+        wait = max(0.0, ready_at - now)
+        if wait > self._max_wait:
+            self._shed += 1
+            raise RateLimitExceeded(self.name, wait)
+        self._tokens -= 1.0
+        self._admitted += 1
+        if wait > 0:
+            self._delayed += 1
+        return wait
+
+    async def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def refund(self) -> None:
+        """Return a token for a call the upstream did not charge for."""
+        self._tokens = min(self._capacity, self._tokens + 1.0)
+
+    def limit_remaining(self, remaining: float) -> None:
+        """Never assume more budget than the server reports."""
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, remaining)
+
+    def block_for(self, seconds: float) -> None:
+        """Admit nothing for ``seconds`` (e.g. after Retry-After or a quota reset)."""
+        until = time.monotonic() + max(0.0, seconds)
+        if until > self._updated:
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = until
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._refill(now)
+        # Negative tokens are reservations still waiting for their slot.
+        return {
+            "rate_per_second": self._rate,
+            "capacity": self._capacity,
+            "available": round(max(self._tokens, 0.0), 2) if now >= self._updated else 0.0,
+            "queued": int(max(-self._tokens, 0.0) + 0.999),
+            "blocked_for": round(max(0.0, self._updated - now), 2),
+            "admitted": self._admitted,
+            "delayed": self._delayed,
+            "shed": self._shed,
+        }
+
+
+class RateLimiter:
+    """Per-upstream token buckets that learn from response headers."""
+
+    def __init__(self, buckets: Dict[str, TokenBucket]) -> None:
+        self._buckets = buckets
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """Build buckets for Gemini, GitHub (core and search) and Open-Meteo."""
+        max_wait = float(os.getenv("RATE_LIMIT_MAX_WAIT", "10"))
+        authenticated = bool(os.getenv("GITHUB_TOKEN"))
+        per_window = {
+            # name: (calls, window seconds)
+            "gemini": (float(os.getenv("GEMINI_RPM", "15")), 60.0),
+            "github_core": (
+                float(os.getenv("GITHUB_CORE_RPH", "5000" if authenticated else "60")),
+                3600.0,
+            ),
+            "github_search": (
+                float(os.getenv("GITHUB_SEARCH_RPM", "30" if authenticated else "10")),
+                60.0,
+            ),
+            "open_meteo": (float(os.getenv("OPEN_METEO_RPM", "600")), 60.0),
+        }
+        return cls(
+            {
+                name: TokenBucket(name, calls / window, calls, max_wait)
+                for name, (calls, window) in per_window.items()
+            }
+        )
+
+    async def acquire(self, upstream: str) -> None:
+        """Wait for budget on ``upstream``, or raise ``RateLimitExceeded``."""
+        bucket = self._buckets.get(upstream)
+        if bucket is not None:
+            await bucket.acquire()
+
+    def refund(self, upstream: str) -> None:
+        bucket = self._buckets.get(upstream)
+        if bucket is not None:
+            bucket.refund()
+
+    def block(self, upstream: str, seconds: float) -> None:
+        bucket = self._buckets.get(upstream)
+        if bucket is not None:
+            bucket.block_for(seconds)
+
+    def observe(self, upstream: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Update a bucket from ``X-RateLimit-*`` and ``Retry-After`` headers.
+
+        GitHub names the budget a response counted against in
+        ``X-RateLimit-Resource`` (``core``/``search``); that bucket is
+        updated in preference to ``upstream``.
+        """
+        resource = headers.get("x-ratelimit-resource")
+        name = f"github_{resource}" if resource and f"github_{resource}" in self._buckets else upstream
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            return
+        retry_after = _parse_float(headers.get("retry-after"))
+        if retry_after is not None and status_code in (403, 429):
+            bucket.block_for(retry_after)
+            return
+        remaining = _parse_float(headers.get("x-ratelimit-remaining"))
+        if remaining is None:
+            return
+        bucket.limit_remaining(remaining)
+        reset = _parse_float(headers.get("x-ratelimit-reset"))
+        if remaining <= 0 and reset is not None:
+            bucket.block_for(reset - time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current budget levels per upstream."""
+        return {name: bucket.stats() for name, bucket in self._buckets.items()}
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
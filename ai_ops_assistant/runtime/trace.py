@@ -0,0 +1,36 @@
+"""Per-request diagnostics reported back in the response metadata."""
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+
+class RequestTrace:
+    """Collects what each stage did for one request (routes, sizes, counts)."""
+
+    def __init__(self) -> None:
+        self.metadata: Dict[str, Any] = {}
+
+    def section(self, name: str) -> Dict[str, Any]:
+        """Return the mutable metadata section for a stage, creating it if needed."""
+        return self.metadata.setdefault(name, {})
+
+
+_current: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def begin_trace(trace: Optional[RequestTrace] = None) -> RequestTrace:
+    """Start a new trace (or resume ``trace``) for the current request.
+
+    Each request runs in its own task (and so its own context copy), so a
+    trace set here is only visible to that request and the tasks it spawns.
+    """
+    trace = trace if trace is not None else RequestTrace()
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> RequestTrace:
+    """Return the active trace, or a throwaway one outside of a request."""
+    trace = _current.get()
+    return trace if trace is not None else RequestTrace()
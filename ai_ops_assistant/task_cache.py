@@ -0,0 +1,106 @@
+"""Whole-task response cache with stale-while-revalidate."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from ai_ops_assistant.llm.cache import ResponseCache
+
+
+NAMESPACE = "task"
+
+
+@dataclass
+class CachedTask:
+    """A stored task response and how old it is."""
+
+    response: Dict[str, Any]
+    etag: str
+    age: float
+    stale: bool
+
+
+def task_key(task: str, skip_verification: bool, template_finalize: bool) -> str:
+    """Return a stable key for a task; whitespace and case do not matter."""
+    normalized = {
+        "task": " ".join(task.split()).casefold(),
+        "skip_verification": skip_verification,
+        "template_finalize": template_finalize,
+    }
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+class TaskResultCache:
+    """Caches whole task responses for a soft and a hard TTL.
+
+    Entries younger than ``soft_ttl`` are fresh. Entries between the soft and
+    hard TTL are returned as ``stale`` so the caller can serve them while it
+    refreshes in the background. Entries past ``hard_ttl`` are gone. Each
+    entry carries an ETag computed from the response's ``result``, so
+    diagnostics in ``metadata`` (timings, trace) do not change it.
+    """
+
+    def __init__(
+        self,
+        soft_ttl: float = 300.0,
+        hard_ttl: int = 3600,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        self._soft_ttl = soft_ttl
+        self._cache = ResponseCache(ttl_seconds=hard_ttl, max_entries=max_entries, max_bytes=max_bytes)
+        self._stale_hits = 0
+        self._refreshes = 0
+
+    @classmethod
+    def from_env(cls) -> "TaskResultCache":
+        """Build a task cache configured from environment variables."""
+        return cls(
+            soft_ttl=float(os.getenv("TASK_CACHE_SOFT_TTL", "300")),
+            hard_ttl=int(os.getenv("TASK_CACHE_HARD_TTL", "3600")),
+            max_entries=int(os.getenv("TASK_CACHE_MAX_ENTRIES", "1024")),
+        )
+
+    def get(self, key: str) -> Optional[CachedTask]:
+        """Return the stored response for ``key``, or None after the hard TTL."""
+        entry = self._cache.get(NAMESPACE, key, namespace=NAMESPACE)
+        if entry is None:
+            return None
+        age = max(0.0, time.time() - entry["stored_at"])
+        stale = age >= self._soft_ttl
+        if stale:
+            self._stale_hits += 1
+        return CachedTask(response=entry["response"], etag=entry["etag"], age=age, stale=stale)
+
+    def set(self, key: str, response: Dict[str, Any]) -> str:
+        """Store a JSON-ready response and return its ETag."""
+        body = json.dumps(
+            response.get("result", response), sort_keys=True, separators=(",", ":"), default=str
+        )
+        etag = f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'
+        self._cache.set(
+            NAMESPACE,
+            key,
+            {"stored_at": time.time(), "etag": etag, "response": response},
+            namespace=NAMESPACE,
+        )
+        return etag
+
+    def record_refresh(self) -> None:
+        self._refreshes += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters plus stale hits and background refreshes."""
+        return {
+            **self._cache.stats(),
+            "stale_hits": self._stale_hits,
+            "refreshes": self._refreshes,
+            "soft_ttl": self._soft_ttl,
+        }
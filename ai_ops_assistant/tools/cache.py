@@ -0,0 +1,107 @@
+"""Result cache for tool calls with per-tool TTLs."""
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+from ai_ops_assistant.llm.cache import ResponseCache
+
+
+DEFAULT_TOOL_TTLS = {
+    "geocode": 30 * 24 * 3600,
+    "weather_current": 600,
+    "weather_batch": 600,
+    "github_search": 600,
+    "github_repo_details": 3600,
+}
+
+
+def _normalize_text(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+def normalize_tool_input(tool: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a tool input to the fields that affect its output.
+
+    Text is whitespace-collapsed and case-folded (GitHub names and city
+    lookups are case-insensitive), aliases are resolved and defaults are
+    filled in, so equivalent inputs produce the same key.
+    """
+    if tool in ("weather_current", "geocode"):
+        return {"city": _normalize_text(payload.get("city") or payload.get("location"))}
+    if tool == "weather_batch":
+        cities = payload.get("cities") or []
+        if isinstance(cities, str):
+            cities = cities.split(",")
+        return {"cities": [_normalize_text(str(city)) for city in cities if str(city).strip()]}
+    if tool == "github_search":
+        return {
+            "query": _normalize_text(payload.get("query")),
+            "per_page": int(payload.get("per_page", 5)),
+        }
+    if tool == "github_repo_details":
+        return {"full_name": _normalize_text(payload.get("full_name"))}
+    return {key: _normalize_text(value) for key, value in payload.items()}
+
+
+def tool_call_key(tool: str, payload: Dict[str, Any]) -> str:
+    """Return a stable key identifying a tool call by its normalized input."""
+    normalized = normalize_tool_input(tool, payload)
+    return f"{tool}:{json.dumps(normalized, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+class ToolResultCache:
+    """Caches successful tool outputs keyed on normalized input.
+
+    Each tool is a namespace of the underlying ``ResponseCache`` so it gets
+    its own TTL and hit/miss counters.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: int = 600,
+        max_entries: int = 4096,
+        max_bytes: int = 16 * 1024 * 1024,
+    ) -> None:
+        self._cache = ResponseCache(
+            ttl_seconds=default_ttl,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            namespace_ttls={**DEFAULT_TOOL_TTLS, **(ttls or {})},
+        )
+
+    @classmethod
+    def from_env(cls) -> "ToolResultCache":
+        """Build a cache configured from environment variables."""
+        ttls = {
+            tool: int(os.environ[var])
+            for tool, var in (
+                ("geocode", "TOOL_CACHE_TTL_GEOCODE"),
+                ("weather_current", "TOOL_CACHE_TTL_WEATHER"),
+                ("weather_batch", "TOOL_CACHE_TTL_WEATHER"),
+                ("github_search", "TOOL_CACHE_TTL_SEARCH"),
+                ("github_repo_details", "TOOL_CACHE_TTL_REPO_DETAILS"),
+            )
+            if os.getenv(var)
+        }
+        return cls(ttls=ttls, max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "4096")))
+
+    def get(self, tool: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached output for a call, if fresh."""
+        return self._cache.get(tool, tool_call_key(tool, payload), namespace=tool)
+
+    def set(self, tool: str, payload: Dict[str, Any], output: Dict[str, Any]) -> None:
+        """Store a successful tool output."""
+        self._cache.set(tool, tool_call_key(tool, payload), output, namespace=tool)
+
+    def clear(self) -> None:
+        """Clear all cached outputs."""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-tool hit ratios plus overall cache counters."""
+        return self._cache.stats()
@@ -0,0 +1,99 @@
+"""ETag / Last-Modified store for conditional HTTP requests."""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from ai_ops_assistant.llm.cache import ResponseCache
+from ai_ops_assistant.llm.sqlite_cache import SqliteCacheStore
+
+
+NAMESPACE = "conditional"
+
+
+def request_key(path: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Return a stable key for a GET request."""
+    return f"{path}?{json.dumps(params or {}, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+class ConditionalCache:
+    """Remembers validators and projected payloads of earlier responses.
+
+    Callers send the stored ``ETag`` / ``Last-Modified`` as ``If-None-Match``
+    / ``If-Modified-Since``. On a ``304`` they reuse the stored payload
+    instead of downloading and parsing the body again. Entries live in an
+    LRU in memory and, with a ``store``, on disk so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 7 * 24 * 3600,
+        max_entries: int = 2048,
+        store: Optional[SqliteCacheStore] = None,
+    ) -> None:
+        self._cache = ResponseCache(ttl_seconds=ttl_seconds, max_entries=max_entries, store=store)
+        self._lock = threading.Lock()
+        self._modified = 0
+        self._not_modified = 0
+        self._bytes_received = 0
+        self._bytes_saved = 0
+
+    @classmethod
+    def from_env(cls) -> "ConditionalCache":
+        """Build a conditional-request cache configured from environment variables."""
+        store = None
+        if os.getenv("GITHUB_ETAG_BACKEND", "memory").lower() == "sqlite":
+            store = SqliteCacheStore(os.getenv("GITHUB_ETAG_PATH", ".cache/github_etags.sqlite3"))
+        return cls(
+            ttl_seconds=int(os.getenv("GITHUB_ETAG_TTL", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("GITHUB_ETAG_MAX_ENTRIES", "2048")),
+            store=store,
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return ``{etag, last_modified, payload, size}`` stored for a request."""
+        return self._cache.get(NAMESPACE, key, namespace=NAMESPACE)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Like ``get``, reading the persistent store off the event loop."""
+        return await self._cache.aget(NAMESPACE, key, namespace=NAMESPACE)
+
+    def set(
+        self,
+        key: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        payload: Any,
+        size: int,
+    ) -> None:
+        """Store a response's validators with its projected payload."""
+        if not etag and not last_modified:
+            return
+        entry = {"etag": etag, "last_modified": last_modified, "payload": payload, "size": size}
+        self._cache.set(NAMESPACE, key, entry, namespace=NAMESPACE)
+
+    def record_modified(self, size: int) -> None:
+        with self._lock:
+            self._modified += 1
+            self._bytes_received += size
+
+    def record_not_modified(self, size: int) -> None:
+        with self._lock:
+            self._not_modified += 1
+            self._bytes_saved += size
+
+    def close(self) -> None:
+        self._cache.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return 200 vs 304 counters and body bytes received vs saved."""
+        with self._lock:
+            return {
+                "responses_200": self._modified,
+                "responses_304": self._not_modified,
+                "bytes_received": self._bytes_received,
+                "bytes_saved": self._bytes_saved,
+                "entries": self._cache.size(),
+            }
@@ -0,0 +1,237 @@
+"""Embedded offline gazetteer of common cities for geocoding without a round trip."""
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+
+# One city per line: "Name[/Alias...]|Country|latitude|longitude". Names that
+# commonly mean another place too (Portland, Washington, Santiago, "LA") are
+# left out, so the geocoder resolves them instead of a silent wrong guess.
+_DATA = """\
+London|United Kingdom|51.51|-0.13
+Manchester|United Kingdom|53.48|-2.24
+Edinburgh|United Kingdom|55.95|-3.20
+Glasgow|United Kingdom|55.86|-4.25
+Dublin|Ireland|53.33|-6.25
+Paris|France|48.85|2.35
+Lyon|France|45.75|4.85
+Marseille|France|43.30|5.38
+Nice|France|43.70|7.27
+Berlin|Germany|52.52|13.41
+Munich/München|Germany|48.14|11.58
+Hamburg|Germany|53.55|10.00
+Frankfurt|Germany|50.12|8.68
+Cologne/Köln|Germany|50.94|6.96
+Amsterdam|Netherlands|52.37|4.89
+Rotterdam|Netherlands|51.92|4.48
+Brussels|Belgium|50.85|4.35
+Antwerp|Belgium|51.22|4.40
+Zurich/Zürich|Switzerland|47.37|8.55
+Geneva|Switzerland|46.20|6.15
+Vienna|Austria|48.21|16.37
+Prague|Czechia|50.09|14.42
+Warsaw|Poland|52.23|21.01
+Krakow/Kraków|Poland|50.06|19.94
+Budapest|Hungary|47.50|19.04
+Copenhagen|Denmark|55.68|12.57
+Stockholm|Sweden|59.33|18.07
+Oslo|Norway|59.91|10.75
+Helsinki|Finland|60.17|24.94
+Reykjavik/Reykjavík|Iceland|64.14|-21.90
+Madrid|Spain|40.42|-3.70
+Barcelona|Spain|41.39|2.16
+Seville/Sevilla|Spain|37.38|-5.97
+Lisbon/Lisboa|Portugal|38.72|-9.13
+Porto|Portugal|41.15|-8.61
+Rome/Roma|Italy|41.89|12.51
+Milan/Milano|Italy|45.46|9.19
+Naples/Napoli|Italy|40.85|14.27
+Athens|Greece|37.98|23.73
+Istanbul|Turkey|41.01|28.95
+Moscow|Russia|55.75|37.62
+Saint Petersburg/St Petersburg|Russia|59.94|30.31
+Kyiv/Kiev|Ukraine|50.45|30.52
+Bucharest|Romania|44.43|26.11
+Sofia|Bulgaria|42.70|23.32
+Belgrade|Serbia|44.80|20.47
+Zagreb|Croatia|45.81|15.98
+New York/New York City/NYC|United States|40.71|-74.01
+Los Angeles|United States|34.05|-118.24
+Chicago|United States|41.85|-87.65
+Houston|United States|29.76|-95.36
+Phoenix|United States|33.45|-112.07
+Philadelphia|United States|39.95|-75.16
+San Antonio|United States|29.42|-98.49
+San Diego|United States|32.72|-117.16
+Dallas|United States|32.78|-96.81
+Austin|United States|30.27|-97.74
+San Francisco|United States|37.77|-122.42
+Seattle|United States|47.61|-122.33
+Denver|United States|39.74|-104.98
+Washington DC/Washington D.C.|United States|38.90|-77.04
+Boston|United States|42.36|-71.06
+Miami|United States|25.77|-80.19
+Atlanta|United States|33.75|-84.39
+Las Vegas|United States|36.17|-115.14
+Detroit|United States|42.33|-83.05
+Minneapolis|United States|44.98|-93.26
+New Orleans|United States|29.95|-90.07
+Toronto|Canada|43.70|-79.42
+Montreal/Montréal|Canada|45.51|-73.59
+Vancouver|Canada|49.25|-123.12
+Calgary|Canada|51.05|-114.09
+Ottawa|Canada|45.41|-75.70
+Mexico City/Ciudad de México|Mexico|19.43|-99.13
+Guadalajara|Mexico|20.67|-103.39
+Monterrey|Mexico|25.67|-100.31
+Havana/La Habana|Cuba|23.13|-82.38
+Bogota/Bogotá|Colombia|4.61|-74.08
+Lima|Peru|-12.04|-77.03
+Quito|Ecuador|-0.23|-78.52
+Caracas|Venezuela|10.49|-66.88
+Buenos Aires|Argentina|-34.61|-58.38
+Montevideo|Uruguay|-34.90|-56.19
+Sao Paulo/São Paulo|Brazil|-23.55|-46.64
+Rio de Janeiro|Brazil|-22.91|-43.18
+Brasilia/Brasília|Brazil|-15.78|-47.93
+Tokyo|Japan|35.69|139.69
+Osaka|Japan|34.69|135.50
+Kyoto|Japan|35.02|135.75
+Seoul|South Korea|37.57|126.98
+Busan|South Korea|35.10|129.04
+Beijing|China|39.91|116.40
+Shanghai|China|31.22|121.46
+Shenzhen|China|22.55|114.07
+Guangzhou|China|23.12|113.25
+Hong Kong|Hong Kong|22.28|114.17
+Taipei|Taiwan|25.05|121.53
+Singapore|Singapore|1.29|103.85
+Bangkok|Thailand|13.75|100.50
+Kuala Lumpur|Malaysia|3.14|101.69
+Jakarta|Indonesia|-6.21|106.85
+Manila|Philippines|14.60|120.98
+Hanoi|Vietnam|21.02|105.84
+Ho Chi Minh City/Saigon|Vietnam|10.82|106.63
+Mumbai/Bombay|India|19.07|72.88
+Delhi|India|28.65|77.23
+New Delhi|India|28.61|77.21
+Bengaluru/Bangalore|India|12.97|77.59
+Chennai|India|13.08|80.27
+Kolkata|India|22.57|88.36
+Pune|India|18.52|73.86
+Ahmedabad|India|23.03|72.58
+Karachi|Pakistan|24.86|67.01
+Lahore|Pakistan|31.55|74.34
+Dhaka|Bangladesh|23.71|90.41
+Kathmandu|Nepal|27.70|85.32
+Colombo|Sri Lanka|6.93|79.85
+Dubai|United Arab Emirates|25.26|55.30
+Abu Dhabi|United Arab Emirates|24.47|54.37
+Doha|Qatar|25.29|51.53
+Riyadh|Saudi Arabia|24.69|46.72
+Tehran|Iran|35.69|51.42
+Tel Aviv|Israel|32.08|34.78
+Jerusalem|Israel|31.77|35.22
+Almaty|Kazakhstan|43.25|76.95
+Tashkent|Uzbekistan|41.26|69.22
+Cairo|Egypt|30.06|31.25
+Lagos|Nigeria|6.45|3.39
+Nairobi|Kenya|-1.28|36.82
+Addis Ababa|Ethiopia|9.02|38.75
+Johannesburg|South Africa|-26.20|28.04
+Cape Town|South Africa|-33.93|18.42
+Casablanca|Morocco|33.59|-7.62
+Algiers|Algeria|36.74|3.09
+Tunis|Tunisia|36.82|10.17
+Accra|Ghana|5.56|-0.20
+Dakar|Senegal|14.69|-17.44
+Kinshasa|DR Congo|-4.33|15.31
+Dar es Salaam|Tanzania|-6.82|39.27
+Sydney|Australia|-33.87|151.21
+Melbourne|Australia|-37.81|144.96
+Brisbane|Australia|-27.47|153.03
+Perth|Australia|-31.95|115.86
+Adelaide|Australia|-34.93|138.60
+Auckland|New Zealand|-36.85|174.76
+Wellington|New Zealand|-41.29|174.78
+"""
+
+def normalize_name(name: str) -> str:
+    """Case-fold, strip accents and collapse whitespace and punctuation."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.replace(".", " ").replace(",", " ").split()).casefold()
+
+
+class Gazetteer:
+    """Case- and accent-insensitive city lookup over a sorted name index.
+
+    Rows are kept as tuples and every name or alias points at its row from a
+    sorted list of normalized keys, so exact lookups and completions are
+    both a binary search (``bisect``). Only ``complete`` matches prefixes;
+    ``lookup`` never guesses a city from part of its name.
+    """
+
+    def __init__(self, data: str = _DATA) -> None:
+        self._rows: List[Tuple[str, str, float, float]] = []
+        index: List[Tuple[str, int]] = []
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            names, country, latitude, longitude = line.split("|")
+            aliases = names.split("/")
+            self._rows.append((aliases[0], country, float(latitude), float(longitude)))
+            for alias in aliases:
+                index.append((normalize_name(alias), len(self._rows) - 1))
+        index.sort()
+        self._keys = [key for key, _ in index]
+        self._positions = [position for _, position in index]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def lookup(self, name: str) -> Optional[Dict[str, object]]:
+        """Resolve a city by its exact (normalized) name or alias.
+
+        Partial names ("Wash") return None and are left to the geocoder.
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        start = bisect_left(self._keys, key)
+        if start < len(self._keys) and self._keys[start] == key:
+            return self._location(self._positions[start])
+        return None
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, object]]:
+        """Return up to ``limit`` cities whose name or alias starts with ``prefix``."""
+        key = normalize_name(prefix)
+        return [
+            self._location(row)
+            for row in self._prefix_rows(key, bisect_left(self._keys, key), limit)
+        ]
+
+    def _prefix_rows(self, key: str, start: int, limit: int) -> List[int]:
+        rows: List[int] = []
+        for position in range(start, len(self._keys)):
+            if not self._keys[position].startswith(key):
+                break
+            row = self._positions[position]
+            if row not in rows:
+                rows.append(row)
+                if len(rows) >= limit:
+                    break
+        return rows
+
+    def _location(self, row: int) -> Dict[str, object]:
+        name, country, latitude, longitude = self._rows[row]
+        return {"name": name, "country": country, "latitude": latitude, "longitude": longitude}
+
+
+@lru_cache(maxsize=None)
+def default_gazetteer() -> Gazetteer:
+    """Return the shared gazetteer, building its index on first use."""
+    return Gazetteer()
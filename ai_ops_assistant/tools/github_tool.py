@@ -1,17 +1,40 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Optional
 
 import httpx
 
+from ai_ops_assistant.runtime.ratelimit import RateLimiter
+from ai_ops_assistant.tools.conditional import ConditionalCache, request_key
+
 
 class GitHubTool:
-    """GitHub API tool for repository search and details."""
+    """GitHub API tool for repository search and details.
+
+    With a ``conditional`` cache, repeated requests are sent with the
+    previous response's ETag / Last-Modified; a ``304`` reuses the stored
+    output and does not count against GitHub's primary rate limit.
+    """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional[RateLimiter] = None,
+        conditional: Optional[ConditionalCache] = None,
+    ) -> None:
         self._token = os.getenv("GITHUB_TOKEN")
-        self._base_url = "https://api.github.com"
+        self._base_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=10)
+        self._limiter = limiter
+        self._conditional = conditional
+
+    async def aclose(self) -> None:
+        """Close the HTTP client if this tool created it."""
+        if self._owns_client:
+            await self._client.aclose()
 
     def _headers(self) -> Dict[str, str]:
         headers = {"Accept": "application/vnd.github+json"}
@@ -19,20 +42,66 @@ class GitHubTool:
             headers["Authorization"] = f"Bearer {self._token}"
         return headers
 
-    def search_repositories(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get(
+        self,
+        budget: str,
+        path: str,
+        project: Callable[[Any], Dict[str, Any]],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """GET within the ``budget`` rate limit and return the projected body.
+
+        Sends a conditional request when validators are stored for it.
+        """
+        key = request_key(path, params)
+        stored = await self._conditional.aget(key) if self._conditional else None
+        headers = self._headers()
+        if stored:
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+        if self._limiter is not None:
+            await self._limiter.acquire(budget)
+        response = await self._client.get(f"{self._base_url}{path}", headers=headers, params=params)
+        if self._limiter is not None:
+            self._limiter.observe(budget, response.status_code, response.headers)
+        if response.status_code == 304 and stored and self._conditional:
+            self._conditional.record_not_modified(stored.get("size", 0))
+            if self._limiter is not None:
+                self._limiter.refund(budget)
+            return stored["payload"]
+        response.raise_for_status()
+        output = project(response.json())
+        if self._conditional:
+            self._conditional.record_modified(len(response.content))
+            # Off the loop: with a persistent store this is a SQLite write.
+            await asyncio.to_thread(
+                self._conditional.set,
+                key,
+                response.headers.get("etag"),
+                response.headers.get("last-modified"),
+                output,
+                len(response.content),
+            )
+        return output
+
+    async def search_repositories(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         query = payload.get("query")
         if not query:
             raise ValueError("query is required for github_search")
         per_page = int(payload.get("per_page", 5))
         params = {"q": query, "per_page": per_page}
-        with httpx.Client(timeout=10) as client:
-            response = client.get(
-                f"{self._base_url}/search/repositories",
-                headers=self._headers(),
-                params=params,
-            )
-            response.raise_for_status()
-            data = response.json()
+        return await self._get("github_search", "/search/repositories", self._project_search, params)
+
+    async def repo_details(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        full_name = payload.get("full_name")
+        if not full_name:
+            raise ValueError("full_name is required for github_repo_details")
+        return await self._get("github_core", f"/repos/{full_name}", self._project_repo)
+
+    @staticmethod
+    def _project_search(data: Dict[str, Any]) -> Dict[str, Any]:
         items = [
             {
                 "name": item["full_name"],
@@ -44,17 +113,8 @@ class GitHubTool:
         ]
         return {"count": len(items), "items": items}
 
-    def repo_details(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        full_name = payload.get("full_name")
-        if not full_name:
-            raise ValueError("full_name is required for github_repo_details")
-        with httpx.Client(timeout=10) as client:
-            response = client.get(
-                f"{self._base_url}/repos/{full_name}",
-                headers=self._headers(),
-            )
-            response.raise_for_status()
-            data = response.json()
+    @staticmethod
+    def _project_repo(data: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "name": data.get("full_name"),
             "url": data.get("html_url"),
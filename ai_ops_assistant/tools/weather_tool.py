@@ -1,15 +1,23 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
 
 import httpx
 
+from ai_ops_assistant.runtime.ratelimit import RateLimiter
+from ai_ops_assistant.tools.cache import ToolResultCache
+from ai_ops_assistant.tools.gazetteer import Gazetteer
+
 
 class WeatherTool:
-    """Open-Meteo API tool for current weather (no API key required)."""
+    """Open-Meteo API tool for current weather (no API key required).
 
-    _GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
-    _FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+    Cities are resolved from the embedded ``gazetteer`` when it knows them,
+    so common cities need no geocoding request. ``current_weather_batch``
+    fetches the forecasts of several cities in one request.
+    """
 
     _WEATHER_CODES = {
         0: "clear sky",
@@ -31,32 +39,122 @@ class WeatherTool:
         95: "thunderstorm",
     }
 
-    def current_weather(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ToolResultCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        gazetteer: Optional[Gazetteer] = None,
+    ) -> None:
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=10)
+        self._cache = cache
+        self._limiter = limiter
+        self._gazetteer = gazetteer
+        geocoding = os.getenv("OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com")
+        forecast = os.getenv("OPEN_METEO_API_URL", "https://api.open-meteo.com")
+        self._geocode_url = f"{geocoding.rstrip('/')}/v1/search"
+        self._forecast_url = f"{forecast.rstrip('/')}/v1/forecast"
+        self._gazetteer_hits = 0
+        self._geocode_requests = 0
+        self._forecast_requests = 0
+        self._batched_cities = 0
+
+    async def aclose(self) -> None:
+        """Close the HTTP client if this tool created it."""
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def _get(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET an Open-Meteo endpoint within its rate limit."""
+        if self._limiter is not None:
+            await self._limiter.acquire("open_meteo")
+        response = await self._client.get(url, params=params)
+        if self._limiter is not None:
+            self._limiter.observe("open_meteo", response.status_code, response.headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def current_weather(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         city = payload.get("city")
         if not city:
             raise ValueError("city is required for weather_current")
 
-        with httpx.Client(timeout=10) as client:
-            geo_resp = client.get(self._GEOCODE_URL, params={"name": city, "count": 1})
-            geo_resp.raise_for_status()
-            geo_data = geo_resp.json()
-            results = geo_data.get("results") or []
-            if not results:
-                raise ValueError(f"No location found for city '{city}'")
-            location = results[0]
-
-            forecast_resp = client.get(
-                self._FORECAST_URL,
-                params={
-                    "latitude": location["latitude"],
-                    "longitude": location["longitude"],
-                    "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code",
-                },
-            )
-            forecast_resp.raise_for_status()
-            data = forecast_resp.json()
-
-        current = data.get("current", {})
+        location = await self._geocode(city)
+        data = await self._forecast([location])
+        return self._summarize(location, data[0].get("current", {}))
+
+    async def current_weather_batch(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Return current weather for several cities with one forecast request.
+
+        Cities already in the tool cache are not fetched again, and each
+        fetched city is cached as a ``weather_current`` result. A city that
+        cannot be found gets an ``error`` entry instead of failing the batch.
+        """
+        cities = payload.get("cities") or []
+        if isinstance(cities, str):
+            cities = cities.split(",")
+        cities = [str(city).strip() for city in cities if str(city).strip()]
+        if not cities:
+            raise ValueError("cities is required for weather_batch")
+
+        outputs: Dict[str, Dict[str, Any]] = {}
+        pending: List[str] = []
+        for city in dict.fromkeys(cities):
+            cached = self._cache.get("weather_current", {"city": city}) if self._cache else None
+            if cached is not None:
+                outputs[city] = cached
+            else:
+                pending.append(city)
+
+        locations = await asyncio.gather(
+            *(self._geocode(city) for city in pending), return_exceptions=True
+        )
+        located = []
+        for city, location in zip(pending, locations):
+            if isinstance(location, ValueError):
+                outputs[city] = {"city": city, "error": str(location)}
+            elif isinstance(location, BaseException):
+                raise location
+            else:
+                located.append((city, location))
+
+        if located:
+            data = await self._forecast([location for _, location in located])
+            self._batched_cities += len(located)
+            for (city, location), entry in zip(located, data):
+                output = self._summarize(location, entry.get("current", {}))
+                outputs[city] = output
+                if self._cache:
+                    self._cache.set("weather_current", {"city": city}, output)
+
+        return {"count": len(cities), "cities": [outputs[city] for city in cities]}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many cities were resolved offline and how many requests were sent."""
+        return {
+            "gazetteer_hits": self._gazetteer_hits,
+            "geocode_requests": self._geocode_requests,
+            "forecast_requests": self._forecast_requests,
+            "batched_cities": self._batched_cities,
+            "gazetteer_cities": len(self._gazetteer) if self._gazetteer is not None else 0,
+        }
+
+    async def _forecast(self, locations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fetch current conditions for all locations in one request, in order."""
+        self._forecast_requests += 1
+        data = await self._get(
+            self._forecast_url,
+            params={
+                "latitude": ",".join(str(location["latitude"]) for location in locations),
+                "longitude": ",".join(str(location["longitude"]) for location in locations),
+                "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code",
+            },
+        )
+        # Open-Meteo returns an object for one location and a list for several.
+        return data if isinstance(data, list) else [data]
+
+    def _summarize(self, location: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
         code = current.get("weather_code")
         return {
             "city": location.get("name"),
@@ -67,3 +165,23 @@ class WeatherTool:
             "conditions": self._WEATHER_CODES.get(code, "unknown"),
             "weather_code": code,
         }
+
+    async def _geocode(self, city: str) -> Dict[str, Any]:
+        """Resolve a city from the gazetteer, else the API (cached for a long TTL)."""
+        if self._gazetteer is not None:
+            location = self._gazetteer.lookup(city)
+            if location is not None:
+                self._gazetteer_hits += 1
+                return location
+        location = self._cache.get("geocode", {"city": city}) if self._cache else None
+        if location is not None:
+            return location
+        self._geocode_requests += 1
+        geo_data = await self._get(self._geocode_url, params={"name": city, "count": 1})
+        results = geo_data.get("results") or []
+        if not results:
+            raise ValueError(f"No location found for city '{city}'")
+        location = {key: results[0].get(key) for key in ("name", "country", "latitude", "longitude")}
+        if self._cache:
+            self._cache.set("geocode", {"city": city}, location)
+        return location
@@ -0,0 +1,213 @@
+"""Load test: drive ``POST /run`` against local fakes of Gemini, GitHub and Open-Meteo.
+
+The app runs unmodified under uvicorn, except that its Gemini model is
+replaced by ``FakeGemini`` and the tool base URLs point at the local fake
+servers. Each upstream can be given latency, jitter and an error rate.
+Reports throughput, p50/p95/p99 latency and upstream calls per task, and
+writes them to a JSON file so runs can be compared. Run with::
+
+    python -m benchmarks.bench_load [--requests N] [--concurrency C] [--output PATH]
+
+The load driver shares the event loop with the servers, so absolute numbers
+are pessimistic; compare runs made on the same machine with the same options.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from ai_ops_assistant.cassette.llm import RecordingModel
+from benchmarks.fakes import FakeGemini, Faults, github_app, open_meteo_app, serve
+
+
+TASKS = [
+    "Get weather in Paris",
+    "Find popular FastAPI repositories",
+    "Weather in Berlin and Tokyo and find vector database repositories",
+    "Compare the weather in London with Madrid and summarize",
+    "Explain which Python web framework repositories are most popular",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def _configure_env(args: argparse.Namespace, github_url: str, meteo_url: str) -> None:
+    os.environ.update(
+        GEMINI_API_KEY=os.getenv("GEMINI_API_KEY") or "benchmark",
+        GITHUB_API_URL=github_url,
+        OPEN_METEO_GEOCODING_URL=meteo_url,
+        OPEN_METEO_API_URL=meteo_url,
+        LLM_RETRY_DELAY=str(args.llm_retry_delay),
+        RATE_LIMIT_ENABLED=str(args.rate_limits).lower(),
+        LOG_LEVEL="ERROR",
+    )
+    if args.record:
+        os.environ.update(CASSETTE_MODE="record", CASSETTE_PATH=str(args.record))
+    if not args.caches:
+        os.environ.update(
+            ENABLE_CACHE="false",
+            TOOL_CACHE_ENABLED="false",
+            TASK_CACHE_ENABLED="false",
+            GITHUB_CONDITIONAL_REQUESTS="false",
+            CACHE_BACKEND="memory",
+        )
+
+
+async def _drive(
+    client: httpx.AsyncClient, tasks: List[str], total: int, concurrency: int, verify: bool
+) -> Tuple[List[float], Counter, float]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    next_index = iter(range(total))
+
+    async def worker() -> None:
+        for index in next_index:
+            body = {"task": tasks[index % len(tasks)], "skip_verification": not verify}
+            started = time.perf_counter()
+            try:
+                response = await client.post("/run", json=body)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    calls: Counter = Counter()
+    gemini = FakeGemini(Faults(args.llm_latency, args.llm_jitter, args.llm_error_rate, args.seed))
+    github = github_app(Faults(args.http_latency, args.http_jitter, args.http_error_rate, args.seed + 1), calls)
+    meteo = open_meteo_app(Faults(args.http_latency, args.http_jitter, args.http_error_rate, args.seed + 2), calls)
+    tasks = args.task or TASKS
+
+    async with serve(github) as github_url, serve(meteo) as meteo_url:
+        _configure_env(args, github_url, meteo_url)
+        from ai_ops_assistant.main import create_app
+
+        app = create_app()
+        async with serve(app) as app_url:
+            context = app.state.context
+            for name in context.llm.models.names:
+                context.llm.models.set_model(
+                    name,
+                    RecordingModel(gemini, context.cassette, name)
+                    if context.cassette is not None
+                    else gemini,
+                )
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+                if args.warmup:
+                    await _drive(client, tasks, args.warmup, args.concurrency, args.verify)
+                gemini.calls, gemini.failures = 0, 0
+                calls.clear()
+                latencies, statuses, elapsed = await _drive(
+                    client, tasks, args.requests, args.concurrency, args.verify
+                )
+                stats = (await client.get("/stats")).json()
+
+    completed = len(latencies)
+    http_calls = calls["github"] + calls["open_meteo"]
+    return {
+        "benchmark": "load",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {**vars(args), "task": tasks},
+        "results": {
+            "requests": completed,
+            "statuses": dict(statuses),
+            "ok": statuses.get("200", 0),
+            "duration_s": round(elapsed, 3),
+            "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": round(sum(latencies) / completed * 1000, 2) if completed else 0.0,
+                "p50": round(percentile(latencies, 50) * 1000, 2),
+                "p95": round(percentile(latencies, 95) * 1000, 2),
+                "p99": round(percentile(latencies, 99) * 1000, 2),
+                "max": round(max(latencies, default=0.0) * 1000, 2),
+            },
+            "llm_calls_per_task": round(gemini.calls / completed, 3) if completed else 0.0,
+            "llm_injected_errors": gemini.failures,
+            "http_calls_per_task": {
+                "github": round(calls["github"] / completed, 3) if completed else 0.0,
+                "open_meteo": round(calls["open_meteo"] / completed, 3) if completed else 0.0,
+                "total": round(http_calls / completed, 3) if completed else 0.0,
+            },
+            "http_injected_errors": calls["github_errors"] + calls["open_meteo_errors"],
+        },
+        "stats": stats,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Measured /run requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=0, help="Unmeasured requests sent first")
+    parser.add_argument("--task", action="append", help="Task text (repeatable; default: a built-in mix)")
+    parser.add_argument("--verify", action="store_true", help="Send skip_verification=false")
+    parser.add_argument("--caches", action="store_true", help="Keep LLM/tool/task caches on")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep client-side rate limits on")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per fake Gemini call")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of ResourceExhausted errors")
+    parser.add_argument("--llm-retry-delay", type=float, default=0.1, help="LLM_RETRY_DELAY for the run")
+    parser.add_argument("--http-latency", type=float, default=0.05, help="Seconds per fake API request")
+    parser.add_argument("--http-jitter", type=float, default=0.02)
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="Share of 503 responses")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Client timeout per request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", type=Path, help="Also record the run to this cassette for replay")
+    parser.add_argument("--output", type=Path, help="JSON result file (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = args.output or Path("benchmarks/results") / (
+        f"load-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=str))
+
+    results = report["results"]
+    latency = results["latency_ms"]
+    print(f"requests      {results['requests']} ({results['statuses']})")
+    print(f"throughput    {results['throughput_rps']} req/s")
+    print(f"latency (ms)  p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"llm calls     {results['llm_calls_per_task']} per task")
+    print(f"http calls    {results['http_calls_per_task']} per task")
+    print(f"saved         {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
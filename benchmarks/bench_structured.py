@@ -0,0 +1,134 @@
+"""Microbenchmark: per-call parse + validate cost of LLM structured output.
+
+Compares the previous ``LlmClient.chat_json`` parsing path (schema classes
+defined per call, up to three parses per response) with the single-pass
+``StructuredParser``. Run with::
+
+    python -m benchmarks.bench_structured [--iterations N]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from ai_ops_assistant.llm.schemas import FinalResponse, Plan, PlanStep, VerificationSchema
+from ai_ops_assistant.llm.structured import _coerce_final_response, structured_parser
+
+
+_STEPS = [
+    {"tool": "github_search", "input": {"query": "fastapi", "per_page": 5}},
+    {"tool": "weather_current", "input": {"city": "Berlin"}},
+]
+CASES: List[Tuple[str, str, str]] = [
+    ("plan_object", "plan", json.dumps({"steps": _STEPS})),
+    ("plan_bare_list", "plan", json.dumps(_STEPS)),
+    ("final_standard", "final", json.dumps(
+        {"answer": "Berlin is 10°C.", "data": {"temp": 10}, "sources": ["Open-Meteo API"]}
+    )),
+    ("final_nonstandard", "final", json.dumps(
+        {"summary": {"text": "Berlin is 10°C."}, "details": [{"temp": 10}], "tools_used": "x"}
+    )),
+    ("verify", "verify", json.dumps(
+        {"status": "complete", "missing": [], "response": {"summary": "ok", "info": {}}}
+    )),
+]
+
+
+def _legacy_plan_schema() -> Type[BaseModel]:
+    class PlanSchema(BaseModel):
+        steps: List[PlanStep] = Field(..., description="Ordered steps to complete the task")
+
+    return PlanSchema
+
+
+def _legacy_verification_schema() -> Type[BaseModel]:
+    class LegacyVerificationSchema(BaseModel):
+        model_config = ConfigDict(populate_by_name=True)
+
+        is_complete: bool = Field(
+            ...,
+            validation_alias=AliasChoices(
+                "is_complete", "verification_status", "status", "plan_complete", "completed"
+            ),
+        )
+        missing: List[str] = Field(default_factory=list)
+        suggested_steps: List[PlanStep] = Field(default_factory=list)
+        final_response: Optional[FinalResponse] = Field(
+            default=None,
+            validation_alias=AliasChoices(
+                "final_response", "response", "final", "final_answer", "answer"
+            ),
+        )
+
+        @field_validator("is_complete", mode="before")
+        @classmethod
+        def _normalize_status(cls, value: Any) -> Any:
+            if isinstance(value, str):
+                return value.strip().lower() in {"complete", "true", "yes", "ok", "done"}
+            return value
+
+    return LegacyVerificationSchema
+
+
+def _legacy_parse(schema: Type[BaseModel], content: str) -> BaseModel:
+    """The pre-engine chat_json parsing logic, kept verbatim for comparison."""
+    try:
+        return schema.model_validate_json(content)
+    except ValidationError as e:
+        try:
+            payload: Any = json.loads(content)
+            if isinstance(payload, list) and "steps" in schema.model_fields:
+                return schema.model_validate({"steps": payload})
+            if hasattr(schema, "__name__") and schema.__name__ == "FinalResponse":
+                return schema.model_validate(_coerce_final_response(payload))
+            raise e
+        except json.JSONDecodeError:
+            raise e
+
+
+def legacy(kind: str, content: str) -> BaseModel:
+    # The planner and verifier used to define their schema classes per call.
+    if kind == "plan":
+        return _legacy_parse(_legacy_plan_schema(), content)
+    if kind == "verify":
+        return _legacy_parse(_legacy_verification_schema(), content)
+    return _legacy_parse(FinalResponse, content)
+
+
+_SCHEMAS: Dict[str, Type[BaseModel]] = {
+    "plan": Plan,
+    "final": FinalResponse,
+    "verify": VerificationSchema,
+}
+
+
+def engine(kind: str, content: str) -> BaseModel:
+    return structured_parser(_SCHEMAS[kind]).parse(content)
+
+
+def _time(fn: Callable[[str, str], BaseModel], kind: str, content: str, iterations: int) -> float:
+    fn(kind, content)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(kind, content)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'case':<20}{'before (us)':>14}{'after (us)':>14}{'speedup':>10}")
+    for name, kind, content in CASES:
+        before = _time(legacy, kind, content, args.iterations)
+        after = _time(engine, kind, content, args.iterations)
+        print(f"{name:<20}{before:>14.1f}{after:>14.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Local stand-ins for Gemini, GitHub and Open-Meteo with latency and error injection.
+
+``FakeGemini`` replaces the ``genai.GenerativeModel`` behind ``LlmClient``
+and answers planner, verifier and finalizer prompts with canned JSON.
+``github_app`` and ``open_meteo_app`` are FastAPI apps that mimic the
+endpoints the tools call; ``serve`` runs any ASGI app on a free local port.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from google.api_core.exceptions import ResourceExhausted
+
+from ai_ops_assistant.llm.prompts import estimate_tokens
+
+
+@dataclass
+class Faults:
+    """Latency and error injection for one fake upstream.
+
+    Each call waits ``latency`` seconds, plus or minus up to ``jitter``,
+    and then fails with probability ``error_rate``. Draws come from a
+    seeded generator, so runs with the same settings see the same faults.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    _random: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)
+
+    async def delay(self) -> None:
+        wait = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and self._random.random() < self.error_rate
+
+
+_CITY = re.compile(r"\b(?:in|for|at|with|and)\s+([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)")
+_TOPIC = re.compile(r"([\w-]+)\s+(?:repos?|repositories|projects)\b", re.IGNORECASE)
+_TASK = re.compile(r"Task:\s*(.+)")
+
+
+class FakeGemini:
+    """Deterministic ``generate_content_async`` with injected latency and quota errors."""
+
+    def __init__(self, faults: Optional[Faults] = None, chunk_chars: int = 48) -> None:
+        self._faults = faults or Faults()
+        self._chunk_chars = chunk_chars
+        self.calls = 0
+        self.failures = 0
+
+    async def generate_content_async(
+        self, prompt: str, generation_config: Any = None, stream: bool = False
+    ) -> Any:
+        self.calls += 1
+        await self._faults.delay()
+        if self._faults.should_fail():
+            self.failures += 1
+            raise ResourceExhausted("Injected quota error")
+        text = json.dumps(self._respond(prompt))
+        usage = SimpleNamespace(
+            prompt_token_count=estimate_tokens(prompt), candidates_token_count=estimate_tokens(text)
+        )
+        if stream:
+            return _FakeStream(text, self._chunk_chars, usage)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    @staticmethod
+    def _respond(prompt: str) -> Dict[str, Any]:
+        if "planning agent" in prompt:
+            match = _TASK.search(prompt)
+            return {"steps": _plan(match.group(1) if match else "")}
+        if "Verifier Agent" in prompt:
+            return {
+                "is_complete": True,
+                "missing": [],
+                "suggested_steps": [],
+                "final_response": _answer(),
+            }
+        return _answer()
+
+
+def _plan(task: str) -> List[Dict[str, Any]]:
+    steps: List[Dict[str, Any]] = []
+    cities = [city for city in _CITY.findall(task) if city.lower() != "github"]
+    if re.search(r"weather|temperature|forecast", task, re.IGNORECASE) and cities:
+        if len(cities) == 1:
+            steps.append({"tool": "weather_current", "input": {"city": cities[0]}})
+        else:
+            steps.append({"tool": "weather_batch", "input": {"cities": cities}})
+    topic = _TOPIC.search(task)
+    if topic:
+        steps.append({"tool": "github_search", "input": {"query": topic.group(1), "per_page": 3}})
+    return steps or [{"tool": "github_search", "input": {"query": "python", "per_page": 3}}]
+
+
+def _answer() -> Dict[str, Any]:
+    return {"answer": "Benchmark answer.", "data": {}, "sources": ["GitHub API", "Open-Meteo API"]}
+
+
+class _FakeStream:
+    """Async iterator of text chunks, like a streamed Gemini response."""
+
+    def __init__(self, text: str, chunk_chars: int, usage: Any) -> None:
+        self._chunks = [text[start:start + chunk_chars] for start in range(0, len(text), chunk_chars)]
+        self.usage_metadata = usage
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        for chunk in self._chunks:
+            await asyncio.sleep(0)
+            yield SimpleNamespace(text=chunk)
+
+
+def _inject(app: FastAPI, name: str, faults: Faults, calls: Counter, status: int) -> None:
+    """Count every request to ``app`` and apply ``faults`` before handling it."""
+
+    @app.middleware("http")
+    async def inject(request: Request, call_next: Any) -> Response:
+        calls[name] += 1
+        await faults.delay()
+        if faults.should_fail():
+            calls[f"{name}_errors"] += 1
+            return JSONResponse({"message": "Injected failure"}, status_code=status)
+        return await call_next(request)
+
+
+def _stable(text: str) -> int:
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+
+
+def _conditional(request: Request, body: Dict[str, Any]) -> Response:
+    """Answer with ``body`` and an ETag, or ``304`` when the client already has it."""
+    payload = json.dumps(body, separators=(",", ":"))
+    etag = f'"{hashlib.sha256(payload.encode()).hexdigest()[:16]}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(payload, media_type="application/json", headers={"ETag": etag})
+
+
+def _repo(full_name: str) -> Dict[str, Any]:
+    seed = _stable(full_name)
+    return {
+        "full_name": full_name,
+        "html_url": f"https://github.com/{full_name}",
+        "stargazers_count": seed % 50000,
+        "forks_count": seed % 5000,
+        "open_issues_count": seed % 300,
+        "language": "Python",
+        "description": f"Benchmark fixture for {full_name}",
+    }
+
+
+def github_app(faults: Optional[Faults] = None, calls: Optional[Counter] = None) -> FastAPI:
+    """A fake GitHub REST API serving repository search and details."""
+    app = FastAPI()
+    _inject(app, "github", faults or Faults(), calls if calls is not None else Counter(), 503)
+
+    @app.get("/search/repositories")
+    async def search(request: Request, q: str, per_page: int = 5) -> Response:
+        slug = re.sub(r"[^\w-]+", "-", q.lower()).strip("-") or "repo"
+        items = [_repo(f"bench-{index}/{slug}") for index in range(per_page)]
+        return _conditional(request, {"total_count": per_page, "items": items})
+
+    @app.get("/repos/{owner}/{name}")
+    async def details(request: Request, owner: str, name: str) -> Response:
+        return _conditional(request, _repo(f"{owner}/{name}"))
+
+    return app
+
+
+def open_meteo_app(faults: Optional[Faults] = None, calls: Optional[Counter] = None) -> FastAPI:
+    """A fake Open-Meteo serving geocoding search and current-weather forecasts."""
+    app = FastAPI()
+    _inject(app, "open_meteo", faults or Faults(), calls if calls is not None else Counter(), 503)
+
+    @app.get("/v1/search")
+    async def geocode(name: str, count: int = 1) -> Dict[str, Any]:
+        seed = _stable(name.casefold())
+        location = {
+            "name": name.title(),
+            "country": "Benchmarkia",
+            "latitude": round(seed % 18000 / 100 - 90, 2),
+            "longitude": round(seed % 36000 / 100 - 180, 2),
+        }
+        return {"results": [location][:count]}
+
+    @app.get("/v1/forecast")
+    async def forecast(latitude: str, longitude: str, current: str = "") -> Any:
+        entries = []
+        for lat, lon in zip(latitude.split(","), longitude.split(",")):
+            seed = _stable(f"{lat},{lon}")
+            entries.append({
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "current": {
+                    "temperature_2m": round(seed % 400 / 10 - 10, 1),
+                    "relative_humidity_2m": seed % 100,
+                    "apparent_temperature": round(seed % 400 / 10 - 12, 1),
+                    "weather_code": (0, 1, 2, 3, 61)[seed % 5],
+                },
+            })
+        return entries if len(entries) > 1 else entries[0]
+
+    return app
+
+
+@asynccontextmanager
+async def serve(app: Any) -> AsyncIterator[str]:
+    """Run an ASGI app with uvicorn on a free local port and yield its base URL."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    task = asyncio.ensure_future(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+            raise RuntimeError("Server exited during startup")
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
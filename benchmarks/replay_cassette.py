@@ -0,0 +1,153 @@
+"""Replay recorded traffic against the current build.
+
+Starts the app with ``CASSETTE_MODE=replay``, so Gemini and the upstream
+APIs are answered from the cassette. Then re-sends the recorded incoming
+requests with their original spacing divided by ``--speed``. Recorded
+upstream latencies are scaled the same way, so ``--speed 10`` plays a
+captured hour in six minutes. ``--speed 0`` sends every request
+immediately (bounded by ``--concurrency``) and does not wait out upstream
+latencies. Run with::
+
+    python -m benchmarks.replay_cassette CASSETTE [--speed N] [--output PATH]
+
+Record a cassette by running the app (or ``benchmarks.bench_load --record``)
+with ``CASSETTE_MODE=record``. Replay with the same cache settings as the
+recording; calls the recording never made are cassette misses.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from ai_ops_assistant.cassette.store import read_records
+from benchmarks.bench_load import _git_commit, percentile
+from benchmarks.fakes import serve
+
+
+async def _send(client: httpx.AsyncClient, record: Dict[str, Any]) -> int:
+    if record["key"] == "/run/stream":
+        async with client.stream("POST", record["key"], json=record["body"]) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response.status_code
+    return (await client.post(record["key"], json=record["body"])).status_code
+
+
+async def _replay(client: httpx.AsyncClient, args: argparse.Namespace) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    slots = asyncio.Semaphore(args.concurrency)
+    pending: List[asyncio.Task] = []
+    first_ts = None
+
+    async def one(record: Dict[str, Any]) -> None:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                statuses[str(await _send(client, record))] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    # Streamed, so a long cassette is never loaded into memory at once.
+    for record in read_records(str(args.cassette)):
+        if record["kind"] != "request":
+            continue
+        if first_ts is None:
+            first_ts = record["ts"]
+        if args.speed > 0:
+            wait = (record["ts"] - first_ts) / args.speed - (time.perf_counter() - started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        pending.append(asyncio.ensure_future(one(record)))
+        if args.limit and len(pending) >= args.limit:
+            break
+    await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - started
+
+    completed = len(latencies)
+    return {
+        "requests": completed,
+        "statuses": dict(statuses),
+        "ok": statuses.get("200", 0) + statuses.get("202", 0),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / completed * 1000, 2) if completed else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0.0) * 1000, 2),
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    os.environ.update(
+        CASSETTE_MODE="replay",
+        CASSETTE_PATH=str(args.cassette),
+        CASSETTE_SPEED=str(args.speed),
+        RATE_LIMIT_ENABLED=str(args.rate_limits).lower(),
+        LOG_LEVEL="ERROR",
+    )
+    from ai_ops_assistant.main import create_app
+
+    app = create_app()
+    async with serve(app) as app_url:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+            results = await _replay(client, args)
+            stats = (await client.get("/stats")).json()
+
+    return {
+        "benchmark": "replay",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": {**results, "cassette": stats.get("cassette")},
+        "stats": stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette", type=Path, help="Cassette recorded with CASSETTE_MODE=record")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0: no waits)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight at once")
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the first N requests")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep client-side rate limits on")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request")
+    parser.add_argument("--output", type=Path, help="JSON result file (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = args.output or Path("benchmarks/results") / (
+        f"replay-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=str))
+
+    results = report["results"]
+    latency = results["latency_ms"]
+    print(f"requests      {results['requests']} ({results['statuses']})")
+    print(f"throughput    {results['throughput_rps']} req/s")
+    print(f"latency (ms)  p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+    print(f"cassette      {results['cassette']}")
+    print(f"saved         {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()